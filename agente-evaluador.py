@@ -15,7 +15,6 @@ import urllib.error
 import gzip
 import zlib
 
-from agenteval import jinja_env
 from agenteval.test.test_result import TestResult
 
 CLAVES_AWS = [
@@ -39,7 +38,7 @@ CLAVES_JIRA = [
     "TRACES_DIR",
 ]
 
-RESULT_MAP = {"A": "Passed", "B": "Failed", "UNKNOWN": "Unknown"}
+RESULT_MAP = {"A": "Passed", "B": "Failed", "SKIPPED": "Skipped", "UNKNOWN": "Unknown"}
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AgentEval/1.0 (+urllib)"
 PRINT_ERR_BODY_BYTES = 1500 
 
@@ -147,14 +146,14 @@ def cargar_env(ruta_env: Path | None) -> dict:
     env["PYTHONPATH"] = os.pathsep.join([env.get("PYTHONPATH", ""), str(Path(".").resolve()), str(Path("tests").resolve())])
     return env
 
+def cargar_plan_compilado(ruta_yaml: Path):
+    """Plan parseado y renderizado una sola vez por contenido, compartido por todos los consumidores."""
+    from agenteval.plan.compiled_plan import load_compiled_plan
+    return load_compiled_plan(str(ruta_yaml))
+
 def cargar_mapa_jira_desde_yaml(ruta_yaml: Path) -> dict:
     try:
-        import yaml
-    except Exception:
-        return {}
-    try:
-        with open(ruta_yaml, "r", encoding="utf-8") as f:
-            doc = yaml.safe_load(f)
+        doc = cargar_plan_compilado(ruta_yaml).config
         out = {}
         if isinstance(doc, dict) and isinstance(doc.get("tests"), dict):
             for nombre, cfg in doc["tests"].items():
@@ -585,24 +584,15 @@ def reportar_a_jira(
     if not test_case_key:
         jprint(f"Jira: Omitido: test '{nombre_test}' sin test_case_key en YAML.")
         return
+    if estado_interno == "SKIPPED":
+        jprint(f"Jira: Omitido: test '{nombre_test}' no llegó a ejecutarse.")
+        return
 
     try:
-        import yaml
-        with open(destino_yaml, 'r', encoding='utf-8') as f:
-            doc = yaml.safe_load(f)
-        test_cfg = doc.get('tests', {}).get(nombre_test, {})
-        steps = test_cfg.get('steps', [])
-        expected_results = test_cfg.get('expected_results', [])
-        vars_glob = doc.get('vars_glob', {})
-        
-        def render_template(text, vars_glob):
-            try:
-                return jinja_env.from_string(text).render(vars_glob=vars_glob)
-            except Exception:
-                return text
-        
-        rendered_steps = [render_template(step, vars_glob) for step in steps]
-        rendered_expected_results = [render_template(exp, vars_glob) for exp in expected_results]
+        # los pasos ya vienen renderizados con vars_glob en el plan compilado
+        test_cfg = cargar_plan_compilado(destino_yaml).config.get('tests', {}).get(nombre_test, {})
+        rendered_steps = list(test_cfg.get('steps', []))
+        rendered_expected_results = list(test_cfg.get('expected_results', []))
     except Exception:
         rendered_steps = []
         rendered_expected_results = []
@@ -746,8 +736,8 @@ def filtrar_yaml_por_test_case_keys(ruta_in: Path, ruta_out: Path, keys: set[str
         import yaml
     except Exception:
         raise RuntimeError("PyYAML es requerido para filtrar por test_case_key.")
-    with open(ruta_in, "r", encoding="utf-8") as f:
-        doc = yaml.safe_load(f)
+    # el YAML sin renderizar, para que la copia filtrada conserve las plantillas
+    doc = cargar_plan_compilado(ruta_in).source
     if not isinstance(doc, dict) or "tests" not in doc or not isinstance(doc["tests"], dict):
         return False
     filtrados = {}
@@ -764,7 +754,7 @@ def filtrar_yaml_por_test_case_keys(ruta_in: Path, ruta_out: Path, keys: set[str
         yaml.safe_dump(nuevo, f, sort_keys=False, allow_unicode=True)
     return True
 
-def ejecutar_uno(ruta_yaml: Path, args) -> dict:
+def preparar_ejecucion(ruta_yaml: Path, args) -> tuple[Path, Path, bool]:
     nombre = ruta_yaml.stem
     dir_ejec = args.salida_dir / sanear(nombre)
     dir_ejec.mkdir(parents=True, exist_ok=True)
@@ -773,27 +763,42 @@ def ejecutar_uno(ruta_yaml: Path, args) -> dict:
 
     if getattr(args, "tc_keys", None):
         ok_filtro = filtrar_yaml_por_test_case_keys(ruta_yaml, destino_yaml, args.tc_keys)
-        if not ok_filtro:
-            inicio = datetime.now(); fin = datetime.now()
-            return {
-                "yaml": str(ruta_yaml),
-                "dir": str(dir_ejec),
-                "rc": 0,
-                "seg": (fin - inicio).total_seconds(),
-                "estado": "SKIPPED",
-                "estado_interno": "UNKNOWN",
-            }
-    else:
-        shutil.copy2(ruta_yaml, destino_yaml)
+        return dir_ejec, destino_yaml, ok_filtro
+
+    shutil.copy2(ruta_yaml, destino_yaml)
+    return dir_ejec, destino_yaml, True
 
+def resultado_omitido(ruta_yaml: Path, dir_ejec: Path) -> dict:
+    return {
+        "yaml": str(ruta_yaml),
+        "dir": str(dir_ejec),
+        "rc": 0,
+        "seg": 0.0,
+        "estado": "SKIPPED",
+        "estado_interno": "UNKNOWN",
+    }
+
+def cargar_entorno(args) -> dict:
     ruta_env = (
         Path(args.archivo_env)
         if args.archivo_env
         else (Path(".") / ".env" if (Path(".") / ".env").exists() else None)
     )
-    entorno = cargar_env(ruta_env)
+    return cargar_env(ruta_env)
+
+def ejecutar_uno(ruta_yaml: Path, args) -> dict:
+    dir_ejec, destino_yaml, ok_filtro = preparar_ejecucion(ruta_yaml, args)
+    if not ok_filtro:
+        return resultado_omitido(ruta_yaml, dir_ejec)
+
+    entorno = cargar_entorno(args)
+    # presupuesto global de conversaciones compartido entre subprocesos
+    entorno.update(getattr(args, "entorno_presupuesto", None) or {})
 
     cmd = [sys.executable, "-m", "agenteval", "run"]
+    if args.max_conversaciones:
+        # ningún archivo necesita más hilos que el presupuesto completo
+        cmd += ["--num-threads", str(args.max_conversaciones)]
     inicio = datetime.now()
 
     (dir_ejec / "logs").mkdir(exist_ok=True)
@@ -877,21 +882,51 @@ def ejecutar_uno(ruta_yaml: Path, args) -> dict:
             sys.stdout.write(f"{ANSI_RED}{l}{ANSI_RESET}")
         print(f"{ANSI_RED}--- Fin ---{ANSI_RESET}\n")
 
+    def extraer_desde_trazas(cfg_jira: dict, nombres_tests: list[str]):
+        traces_root = (dir_ejec / cfg_jira.get("traces_dir", "agenteval_traces")).resolve()
+        estados_por_test = _extraer_estados_por_test(
+            traces_root=traces_root,
+            nombres_tests=nombres_tests
+        )
+        
+        tiempos_por_test = _extraer_tiempos_por_test(
+            traces_root=traces_root,
+            nombres_tests=nombres_tests,
+        )
+        return estados_por_test, tiempos_por_test
+
+    reportar_resultados_jira(
+        entorno, destino_yaml, dir_ejec, extraer_desde_trazas,
+        estado_interno, estado_final, inicio, fin,
+    )
+
+    return {
+        "yaml": str(ruta_yaml),
+        "dir": str(dir_ejec),
+        "rc": rc,
+        "seg": (fin - inicio).total_seconds(),
+        "estado": estado_final,
+        "estado_interno": estado_interno,
+    }
+
+def reportar_resultados_jira(
+    entorno: dict,
+    destino_yaml: Path,
+    dir_ejec: Path,
+    extraer_resultados,
+    estado_interno: str,
+    estado_final: str,
+    inicio: datetime,
+    fin: datetime,
+):
     ok_jira, cfg_jira, faltan = jira_config(entorno)
     if ok_jira:
         mapa_yaml = cargar_mapa_jira_desde_yaml(destino_yaml)
         if not mapa_yaml:
             jprint("Jira: No se encontraron test_case_key en el YAML.")
         else:
-            traces_root = (dir_ejec / cfg_jira.get("traces_dir", "agenteval_traces")).resolve()
-            estados_por_test = _extraer_estados_por_test(
-                traces_root=traces_root,
-                nombres_tests=list(mapa_yaml.keys())
-            )
-            
-            tiempos_por_test = _extraer_tiempos_por_test(
-                traces_root=traces_root,
-                nombres_tests=list(mapa_yaml.keys()),
+            estados_por_test, tiempos_por_test = extraer_resultados(
+                cfg_jira, list(mapa_yaml.keys())
             )
 
             for nombre_test in mapa_yaml.keys():
@@ -933,14 +968,114 @@ def ejecutar_uno(ruta_yaml: Path, args) -> dict:
         else:
             jprint("Jira: No configurado. La ejecución continúa sin actualizar Jira.")
 
-    return {
-        "yaml": str(ruta_yaml),
-        "dir": str(dir_ejec),
-        "rc": rc,
-        "seg": (fin - inicio).total_seconds(),
-        "estado": estado_final,
-        "estado_interno": estado_interno,
-    }
+def _estado_desde_resultado(resultado: TestResult) -> tuple[str, str, str, str]:
+    if resultado.skipped:
+        # la corrida se detuvo antes de terminarlo: no cuenta como fallido
+        estado_interno = "SKIPPED"
+    else:
+        estado_interno = "A" if resultado.passed else "B"
+    # mismo formato que el bloque <conversation> de las trazas
+    conversacion = "\n".join(
+        f"{emisor}: {mensaje}" for emisor, mensaje in resultado.conversation
+    )
+    return (
+        estado_interno,
+        RESULT_MAP.get(estado_interno, "Unknown"),
+        resultado.reasoning,
+        conversacion,
+    )
+
+def ejecutar_en_proceso(archivos: list[Path], args) -> list[dict]:
+    """Ejecuta todos los YAML en este mismo proceso con un único planificador.
+
+    Evita lanzar un `python -m agenteval run` por archivo: boto3, las credenciales y
+    los clientes se inicializan una sola vez, y los resultados se obtienen como
+    `TestResult` sin volver a leer las trazas.
+    """
+    from agenteval import configure_logger
+    from agenteval.plan import Plan, PlanRunner
+
+    configure_logger()
+    entorno = cargar_entorno(args)
+    for k in CLAVES_AWS:
+        if entorno.get(k):
+            os.environ[k] = entorno[k]
+    # equivalente al PYTHONPATH que recibe cada subproceso (hooks y targets propios)
+    for ruta in (Path(".").resolve(), Path("tests").resolve()):
+        if str(ruta) not in sys.path:
+            sys.path.append(str(ruta))
+
+    hilos = args.hilos
+    if args.max_conversaciones:
+        # en un solo proceso, los hilos compartidos ya son el presupuesto global
+        hilos = min(hilos or args.max_conversaciones, args.max_conversaciones)
+
+    runner = PlanRunner(
+        num_threads=hilos,
+        verbose=args.detallado,
+        show_progress=not args.detallado,
+        stop_all=args.detener_al_fallar,
+    )
+    resultados = []
+    preparados = []
+    for ruta_yaml in archivos:
+        dir_ejec, destino_yaml, ok_filtro = preparar_ejecucion(ruta_yaml, args)
+        if not ok_filtro:
+            resultados.append(resultado_omitido(ruta_yaml, dir_ejec))
+            continue
+        try:
+            plan = Plan.load(str(dir_ejec))
+        except Exception as e:
+            print(f"{ANSI_RED}No se pudo cargar {ruta_yaml}: {e}{ANSI_RESET}")
+            resultados.append({
+                "yaml": str(ruta_yaml),
+                "dir": str(dir_ejec),
+                "rc": 1,
+                "seg": 0.0,
+                "estado": "ERROR",
+                "estado_interno": "UNKNOWN",
+            })
+            if args.detener_al_fallar:
+                break
+            continue
+        runner.add(
+            plan,
+            work_dir=str(dir_ejec),
+            fail_fast=1 if args.detener_al_fallar else None,
+        )
+        preparados.append((ruta_yaml, dir_ejec, destino_yaml))
+
+    corridas = runner.run() if preparados else []
+
+    for (ruta_yaml, dir_ejec, destino_yaml), corrida in zip(preparados, corridas):
+        rc = 0 if corrida.passed else 1
+        estado_interno, estado_final = derivar_estado_rc(rc=rc)
+
+        def extraer_desde_resultados(cfg_jira: dict, nombres_tests: list[str], corrida=corrida):
+            estados_por_test = {
+                r.test_name: _estado_desde_resultado(r) for r in corrida.results
+            }
+            tiempos_por_test = {
+                r.test_name: (r.start_time, r.end_time)
+                for r in corrida.results
+                if r.start_time and r.end_time
+            }
+            return estados_por_test, tiempos_por_test
+
+        reportar_resultados_jira(
+            entorno, destino_yaml, dir_ejec, extraer_desde_resultados,
+            estado_interno, estado_final, corrida.start_time, corrida.end_time,
+        )
+        resultados.append({
+            "yaml": str(ruta_yaml),
+            "dir": str(dir_ejec),
+            "rc": rc,
+            "seg": corrida.elapsed_time,
+            "estado": estado_final,
+            "estado_interno": estado_interno,
+        })
+
+    return resultados
 
 def descubrir_pruebas(dir_pruebas: Path, patrones):
     archivos = []
@@ -961,6 +1096,23 @@ def principal():
     parser.add_argument("--detallado", action="store_true", help="Salida detallada")
     parser.add_argument("--lineas-errores", type=int, default=80, help="Líneas de log a mostrar al fallar")
     parser.add_argument("--archivo-env", default=None, help="Ruta a .env")
+    parser.add_argument(
+        "--en-proceso",
+        action="store_true",
+        help="Ejecuta todos los YAML en este proceso con un planificador y clientes AWS compartidos, en lugar de un subproceso por archivo",
+    )
+    parser.add_argument(
+        "--hilos",
+        type=int,
+        default=None,
+        help="Conversaciones simultáneas entre todos los YAML con --en-proceso (por defecto, el número de tests hasta 45)",
+    )
+    parser.add_argument(
+        "--max-conversaciones",
+        type=int,
+        default=None,
+        help="Máximo de conversaciones simultáneas contra Bedrock sumando todos los archivos en paralelo (p.ej. 40)",
+    )
     parser.add_argument(
         "-t", "--test-case-key",
         default="",
@@ -991,9 +1143,25 @@ def principal():
 
     print(f"Encontrados {len(archivos)} archivo(s). En paralelo: {args.concurrencia}")
 
+    if args.max_conversaciones is not None and args.max_conversaciones < 1:
+        print("ERROR: --max-conversaciones debe ser al menos 1", file=sys.stderr)
+        sys.exit(2)
+    args.entorno_presupuesto = {}
+    if args.max_conversaciones and not args.en_proceso:
+        from agenteval.plan.budget import ConversationBudgetServer
+
+        servidor_presupuesto = ConversationBudgetServer(args.max_conversaciones)
+        servidor_presupuesto.start()
+        args.entorno_presupuesto = servidor_presupuesto.environ()
+        print(f"Máximo de conversaciones simultáneas: {args.max_conversaciones}")
+
     resultados = []
 
-    if args.concurrencia <= 1 or args.detallado:
+    if args.en_proceso:
+        resultados = ejecutar_en_proceso(archivos, args)
+        for r in resultados:
+            print(f"[{r['estado']}] {r['yaml']} -> {r['dir']}")
+    elif args.concurrencia <= 1 or args.detallado:
         for a in archivos:
             r = ejecutar_uno(a, args)
             resultados.append(r)
@@ -1,24 +1,33 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from importlib.metadata import version
-
 import logging
 import os
 
-from jinja2 import Environment, PackageLoader, select_autoescape
-from rich.logging import RichHandler
-
 from .hook import Hook
 
 __all__ = ["Hook"]
-__version__ = version("agent-evaluation")
 
 
 _LOG_LEVEL_ENV = "LOG_LEVEL"
 
+_logger_configured = False
+
 
 def configure_logger():
+    """Send the logs of the package to a rich handler.
+
+    It is called by the entry points rather than on import, since importing rich takes
+    a noticeable part of the start-up time. Calling it again has no effect.
+    """
+    global _logger_configured
+
+    if _logger_configured:
+        return
+    _logger_configured = True
+
+    from rich.logging import RichHandler
+
     # supress logs from botocore
     logging.getLogger("botocore").setLevel(logging.CRITICAL)
 
@@ -33,13 +42,28 @@ def configure_logger():
     logger.addHandler(handler)
 
 
-configure_logger()
+def _create_jinja_env():
+    from jinja2 import Environment, PackageLoader, select_autoescape
+
+    return Environment(
+        loader=PackageLoader(__name__),
+        autoescape=select_autoescape(
+            disabled_extensions=["jinja"],
+            default_for_string=True,
+            default=True,
+        ),
+    )
+
+
+def __getattr__(name: str):
+    # `__version__` and `jinja_env` are only set up when first accessed, which keeps
+    # them out of the start-up time of commands that do not need them
+    if name == "__version__":
+        from importlib.metadata import version
 
-jinja_env = Environment(
-    loader=PackageLoader(__name__),
-    autoescape=select_autoescape(
-        disabled_extensions=["jinja"],
-        default_for_string=True,
-        default=True,
-    ),
-)
+        globals()[name] = version("agent-evaluation")
+    elif name == "jinja_env":
+        globals()[name] = _create_jinja_env()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return globals()[name]
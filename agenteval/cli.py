@@ -7,6 +7,7 @@ from typing import Optional
 
 import click
 
+from agenteval import configure_logger
 from agenteval.plan import Plan
 from agenteval.plan.exceptions import TestFailureError
 
@@ -26,7 +27,7 @@ def validate_directory(ctx, param, value):
 
 @click.group()
 def cli():
-    pass
+    configure_logger()
 
 
 @cli.command(help="Initialize a test plan.")
@@ -78,18 +79,147 @@ def init(plan_dir: Optional[str]):
     help="The directory where the test result and trace will be generated. If a directory is not provided, the assets will be saved to the current working directory.",
     callback=validate_directory,
 )
+@click.option(
+    "--adaptive",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="Whether to adapt the number of concurrent tests to throttling and latency observed on the evaluator and target, using --num-threads as the upper bound. Defaults to False.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="Whether to resume an interrupted run in the work directory, skipping the tests already recorded in its agenteval_results.jsonl. Defaults to False.",
+)
+@click.option(
+    "--reuse-passed",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="Whether to reuse the cached result of tests that passed in a previous run and whose test, target and evaluator configuration have not changed since. Passing tests of this run are cached. Defaults to False.",
+)
+@click.option(
+    "--cache-dir",
+    type=str,
+    required=False,
+    help="The directory of the result cache used by --reuse-passed. If a directory is not provided, ~/.agenteval/results will be used.",
+)
+@click.option(
+    "--cache-ttl",
+    type=float,
+    required=False,
+    help="The number of hours a cached result can be reused. If a value is not provided, cached results will be reused for 24 hours.",
+)
+@click.option(
+    "--fail-fast",
+    type=click.IntRange(min=1),
+    required=False,
+    help="Stop the run after the given number of failed tests. Queued tests are skipped and running tests end at their next turn. If a value is not provided, all tests will be run.",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=1,
+    help="The number of independent runs of each test. Runs share the thread pool, each has its own target session and trace file, and the summary reports the pass rate, confidence interval and latency spread of each test. Defaults to 1.",
+)
+@click.option(
+    "--pipeline",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="Whether to run the tests in two phases: conversations end once all steps have been attempted, and their final evaluations are then run in a separate pool, using the final_evaluator section of the plan if provided. Defaults to False.",
+)
+@click.option(
+    "--num-eval-threads",
+    type=int,
+    required=False,
+    help="Number of threads used to run the final evaluations of --pipeline concurrently. If the number of threads is not provided, the thread count will be set to the number of evaluations (up to a maximum of 45 threads).",
+)
+@click.option(
+    "--reevaluate",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="Whether to resume the run in the work directory and evaluate again the conversations it recorded with --pipeline, without talking to the target again. Defaults to False.",
+)
 def run(
     filter: Optional[str],
     plan_dir: Optional[str],
     verbose: bool,
     num_threads: Optional[int],
     work_dir: Optional[str],
+    adaptive: bool,
+    resume: bool,
+    reuse_passed: bool,
+    cache_dir: Optional[str],
+    cache_ttl: Optional[float],
+    fail_fast: Optional[int],
+    repeat: int,
+    pipeline: bool,
+    num_eval_threads: Optional[int],
+    reevaluate: bool,
 ):
     try:
         plan = Plan.load(plan_dir)
         plan.run(
-            verbose=verbose, num_threads=num_threads, work_dir=work_dir, filter=filter
+            verbose=verbose,
+            num_threads=num_threads,
+            work_dir=work_dir,
+            filter=filter,
+            adaptive=adaptive,
+            resume=resume,
+            reuse_passed=reuse_passed,
+            cache_dir=cache_dir,
+            cache_ttl_hours=cache_ttl,
+            fail_fast=fail_fast,
+            repeat=repeat,
+            pipeline=pipeline,
+            num_eval_threads=num_eval_threads,
+            reevaluate=reevaluate,
         )
 
     except TestFailureError:
         exit(ExitCode.TESTS_FAILED.value)
+
+
+@cli.command(help="Invalidate cached test results.")
+@click.option(
+    "--filter",
+    type=str,
+    required=False,
+    help="Specifies the test(s) to invalidate, where multiple tests should be seperated using a comma. If a filter is not provided, all tests of the plan will be invalidated.",
+)
+@click.option(
+    "--plan-dir",
+    type=str,
+    required=False,
+    help="The directory where the test plan is stored. If a directory is not provided, the test plan will be read from the current working directory.",
+    callback=validate_directory,
+)
+@click.option(
+    "--cache-dir",
+    type=str,
+    required=False,
+    help="The directory of the result cache. If a directory is not provided, ~/.agenteval/results will be used.",
+)
+@click.option(
+    "--all",
+    "clear_all",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="Whether to remove every cached result instead of only those of the test plan. Defaults to False.",
+)
+def invalidate_cache(
+    filter: Optional[str],
+    plan_dir: Optional[str],
+    cache_dir: Optional[str],
+    clear_all: bool,
+):
+    if clear_all:
+        removed = Plan.clear_cached_results(cache_dir)
+    else:
+        removed = Plan.load(plan_dir).invalidate_cached_results(filter, cache_dir)
+    click.echo(f"Removed {removed} cached result(s).")
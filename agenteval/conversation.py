@@ -1,6 +1,7 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import threading
 import uuid
 
 
@@ -16,6 +17,7 @@ class Conversation:
         messages (list): A list of tuples of the form (role, message).
         turns (int): The number of turns in the conversation.
         conversation_id (str): Unique ID for the conversation.
+        transcript (str): The messages rendered as the evaluator prompts show them.
     """
 
     def __init__(self, conversation_id=None):
@@ -25,10 +27,47 @@ class Conversation:
         self.messages = []
         self.turns = _START_TURN_COUNT
         self.conversation_id = conversation_id or str(uuid.uuid4()) 
+        # the transcript is extended with the messages added since it was last read
+        self._transcript = ""
+        self._transcript_length = 0
+        self._transcript_lock = threading.Lock()
 
     def __iter__(self):
         return iter(self.messages)
 
+    @property
+    def transcript(self) -> str:
+        """The messages rendered one per line as `SENDER: message`.
+
+        Only the messages added since the transcript was last read are rendered, so
+        the prompts of a turn do not re-render the whole conversation.
+        """
+        # drafts of the next user response may read it concurrently with the status
+        with self._transcript_lock:
+            if self._transcript_length < len(self.messages):
+                self._transcript += "".join(
+                    f"{sender}: {message}\n"
+                    for sender, message in self.messages[self._transcript_length :]
+                )
+                self._transcript_length = len(self.messages)
+            return self._transcript
+
+    def to_dict(self) -> dict:
+        """Return a JSON-serializable representation of the conversation."""
+        return {
+            "conversation_id": self.conversation_id,
+            "turns": self.turns,
+            "messages": [list(message) for message in self.messages],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Conversation":
+        """Create a conversation from the output of `to_dict`."""
+        conversation = cls(conversation_id=data.get("conversation_id"))
+        conversation.messages = [tuple(message) for message in data.get("messages", [])]
+        conversation.turns = data.get("turns", len(conversation.messages) // 2)
+        return conversation
+
     def add_turn(self, user_message: str, agent_response: str):
         """Record a turn in the conversation.
 
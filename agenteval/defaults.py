@@ -1,8 +1,30 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import os
+
 MAX_TURNS = 2
 
 # Default max number of threads not exceeding Bedrock service quota:
 # https://docs.aws.amazon.com/bedrock/latest/userguide/quotas.html
 MAX_NUM_THREADS = 45
+
+# Number of concurrent tests an adaptive run starts with before growing
+ADAPTIVE_INITIAL_NUM_THREADS = 4
+
+# Directory for state kept across runs
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".agenteval")
+
+# Store of passing results reused by `--reuse-passed`
+RESULT_CACHE_DIR = os.path.join(STATE_DIR, "results")
+RESULT_CACHE_TTL_HOURS = 24
+
+# Durations of previous runs, used to start the longest tests first
+DURATION_HISTORY_PATH = os.path.join(STATE_DIR, "durations.json")
+
+# Store of evaluator model responses used by the `response_cache` evaluator setting
+RESPONSE_CACHE_DIR = os.path.join(STATE_DIR, "responses")
+RESPONSE_CACHE_MAX_SIZE_MB = 512
+
+# How long a test waits for a slot of a conversation budget shared with other runs
+CONVERSATION_BUDGET_TIMEOUT_SECONDS = 3600
@@ -1,25 +1,79 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import concurrent.futures
+import dataclasses
 import json
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Callable, Iterator, Optional
 
+from agenteval import defaults
 from agenteval.conversation import Conversation
+from agenteval.evaluators.exceptions import EvaluationTimeoutError
 from agenteval.evaluators.model_config.bedrock_model_config import BedrockModelConfig
 from agenteval.hook import Hook
 from agenteval.targets import BaseTarget
 from agenteval.test import Test, TestResult
 from agenteval.trace import Trace
-from agenteval.utils import create_boto3_client, import_class
+from agenteval.utils import (
+    get_boto3_client,
+    get_rate_limiter,
+    get_response_cache,
+    import_class,
+)
+from agenteval.utils.response_cache import MODES, decode_response, encode_response
 
 _BOTO3_SERVICE_NAME = "bedrock-runtime"
 
+# rough number of characters per token, used to estimate the output of a stream read partially
+_CHARS_PER_TOKEN = 4
+
+
+def _run_in_daemon_thread(fn: Callable[..., Any], *args, **kwargs) -> concurrent.futures.Future:
+    future = concurrent.futures.Future()
+
+    def call():
+        # once running, the future can no longer be cancelled by an abandoned waiter
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=call, daemon=True).start()
+    return future
+
+
+class _CallRecord:
+    """The trace steps and token counts of a call run in a daemon thread.
+
+    They are applied to the evaluator only once the result of the call is used, so a
+    call that is abandoned cannot change the trace or the token counts of a test after
+    its result has been built.
+    """
+
+    def __init__(self):
+        self.steps = []
+        # input, output, cache read, cache write and estimated output tokens
+        self.token_counts = [0, 0, 0, 0, 0]
+        # background calls started by the call whose results were not used
+        self.discarded = []
+
 
 class BaseEvaluator(ABC):
     """The `BaseEvaluator` abstract base class defines the common interface for evaluator
     classes.
 
+    When the test sets `timeout_seconds` or `turn_timeout_seconds`, evaluators start the
+    clocks with `_start_test_clock` and `_start_turn_clock` and make their target and
+    model calls through `_call_with_deadline`, which raises `EvaluationTimeoutError`
+    once the earliest deadline passes. A call still blocked at that point is abandoned,
+    so the test ends and its worker is free to run the next one. The trace steps and
+    token counts of an abandoned call are discarded.
+
     Attributes:
         test (Test): The test case.
         target (BaseTarget): The target agent being evaluated.
@@ -28,11 +82,33 @@ class BaseEvaluator(ABC):
         test_result (TestResult): The result of the test which is set in `BaseEvaluator.run`.
         input_token_count (int): Number of input tokens processed by the evaluator.
         output_token_count (int): Number of output tokens generated by the evaluator.
+        estimated_output_token_count (int): The part of `output_token_count` estimated from
+            the text of responses whose stream was closed before Bedrock reported its usage.
+        cache_read_token_count (int): Number of input tokens read from the Bedrock prompt cache.
+        cache_write_token_count (int): Number of input tokens written to the Bedrock prompt cache.
+        prompt_caching (bool): Whether the static part of the evaluator prompts is sent as
+            cache points, for models that support prompt caching.
         model_config (BedrockModelConfig): A configuration of the bedrock model being used. If `provisioned_throughput_arn` is provided,
             then the model_id will be set to the ARN of the provisioned throughput.
-        boto3_client (BaseClient): A `boto3` client representing Amazon Bedrock Runtime.
+        bedrock_runtime_client (BaseClient): A `boto3` client representing Amazon Bedrock Runtime,
+            taken from the shared client pool.
+        rate_limiter (Optional[RateLimiter]): The process-wide rate limiter for the model, if
+            a requests or tokens per minute quota is configured.
+        cancel_event (Optional[threading.Event]): An event set when the run is stopped. Evaluators
+            check it between turns and end the test early once it is set.
+        response_cache (Optional[ResponseCache]): The process-wide store of model responses,
+            if a `response_cache` mode is configured.
+        response_cache_mode (Optional[str]): The mode of the response cache.
+        streaming (bool): Whether evaluators read model responses as a stream, so they
+            can stop once the content they need has been generated.
+        defer_evaluation (bool): Whether `evaluate` stops once the conversation is complete,
+            returning a result pending evaluation, which `run_evaluation` completes later.
+        supports_deferred_evaluation (bool): Whether the evaluator class supports
+            `defer_evaluation`. Classes setting it implement `evaluate_conversation`.
     """
 
+    supports_deferred_evaluation: bool = False
+
     def __init__(
         self,
         test: Test,
@@ -44,6 +120,16 @@ class BaseEvaluator(ABC):
         aws_region: Optional[str] = None,
         endpoint_url: Optional[str] = None,
         max_retry: int = 10,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None,
+        repetition: Optional[int] = None,
+        prompt_caching: bool = False,
+        response_cache: Optional[str] = None,
+        response_cache_dir: Optional[str] = None,
+        response_cache_max_size_mb: Optional[float] = None,
+        streaming: bool = False,
+        defer_evaluation: bool = False,
     ):
         """Initialize the evaluator.
 
@@ -58,28 +144,91 @@ class BaseEvaluator(ABC):
             aws_region (Optional[str]): The AWS region.
             endpoint_url (Optional[str]): The endpoint URL for the AWS service.
             max_retry (int): The maximum number of retry attempts.
+            requests_per_minute (Optional[int]): The model's requests per minute quota. Calls to
+                `invoke_model` wait for a free request slot when provided.
+            tokens_per_minute (Optional[int]): The model's tokens per minute quota. The input and
+                output tokens reported by Bedrock are charged against it.
+            cancel_event (Optional[threading.Event]): An event signalling that the test should
+                stop at its next turn boundary.
+            repetition (Optional[int]): The repetition of the test, if the test is repeated.
+                Each repetition is traced to its own file.
+            prompt_caching (bool): Whether to send the system prompt and the static start of
+                the prompt as cache points. Only Anthropic models support it, and only prompts
+                above the model's minimum cacheable length are cached.
+            response_cache (Optional[str]): The mode of the model response cache: `"read-through"`
+                serves cached responses and stores new ones, `"record"` always calls the model and
+                stores its responses, and `"replay"` only serves cached responses. If `None`,
+                responses are not cached.
+            response_cache_dir (Optional[str]): The directory of the response cache. If `None`,
+                `~/.agenteval/responses` is used.
+            response_cache_max_size_mb (Optional[float]): The size of the response cache above
+                which the least recently used responses are removed. If `None`, 512 MB is used.
+            streaming (bool): Whether to call the model with `InvokeModelWithResponseStream`,
+                so evaluators can stop reading a response early. Responses are not streamed
+                while a response cache is used.
+            defer_evaluation (bool): Whether to end the test once all steps have been
+                attempted, without evaluating the conversation against the expected results.
         """
+        if defer_evaluation and not self.supports_deferred_evaluation:
+            raise ValueError(
+                f"{type(self).__name__} does not support deferred evaluation"
+            )
+
         # overwrite the model_id with the provisioned_throughput_arn if provided, keep the request_config the same.
         if provisioned_throughput_arn:
-            model_config = BedrockModelConfig(
-                model_id=provisioned_throughput_arn,
-                request_body=model_config.request_body,
+            model_config = dataclasses.replace(
+                model_config, model_id=provisioned_throughput_arn
             )
         self.test = test
         self.target = target
         self.conversation = Conversation()
-        self.trace = Trace(work_dir=work_dir, test_name=test.name)
+        self.trace = Trace(
+            work_dir=work_dir, test_name=test.name, repetition=repetition
+        )
         self.test_result = None
         self.input_token_count = 0
         self.output_token_count = 0
+        self.estimated_output_token_count = 0
+        self.cache_read_token_count = 0
+        self.cache_write_token_count = 0
+        self.prompt_caching = prompt_caching
         self.model_config = model_config
-        self.bedrock_runtime_client = create_boto3_client(
+        self.bedrock_runtime_client = get_boto3_client(
             boto3_service_name=_BOTO3_SERVICE_NAME,
             aws_profile=aws_profile,
             aws_region=aws_region,
             endpoint_url=endpoint_url,
             max_retry=max_retry,
         )
+        self.rate_limiter = get_rate_limiter(
+            self.model_config.model_id,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+        )
+        if response_cache is not None and response_cache not in MODES:
+            raise ValueError(f"Unsupported response cache mode: {response_cache}")
+        self.response_cache_mode = response_cache
+        self.response_cache = (
+            get_response_cache(
+                response_cache_dir or defaults.RESPONSE_CACHE_DIR,
+                int(
+                    (response_cache_max_size_mb or defaults.RESPONSE_CACHE_MAX_SIZE_MB)
+                    * 1024
+                    * 1024
+                ),
+            )
+            if response_cache
+            else None
+        )
+        self.streaming = streaming
+        self.defer_evaluation = defer_evaluation
+        self.cancel_event = cancel_event
+        self._token_count_lock = threading.Lock()
+        # the record of the call running in the current thread, see `_run_recorded`
+        self._call_local = threading.local()
+        self._discarded_calls = []
+        self._test_deadline = None
+        self._turn_deadline = None
 
     @abstractmethod
     def evaluate(self) -> TestResult:
@@ -90,6 +239,143 @@ class BaseEvaluator(ABC):
         """
         pass
 
+    @property
+    def cancelled(self) -> bool:
+        """Whether the run has been stopped and the test should end early."""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _start_test_clock(self):
+        if self.test.timeout_seconds:
+            self._test_deadline = (
+                time.monotonic() + self.test.timeout_seconds,
+                f"test timeout of {self.test.timeout_seconds}s",
+            )
+
+    def _start_turn_clock(self):
+        if self.test.turn_timeout_seconds:
+            self._turn_deadline = (
+                time.monotonic() + self.test.turn_timeout_seconds,
+                f"turn timeout of {self.test.turn_timeout_seconds}s",
+            )
+
+    def _next_deadline(self) -> Optional[tuple[float, str]]:
+        deadlines = [d for d in (self._test_deadline, self._turn_deadline) if d]
+        return min(deadlines) if deadlines else None
+
+    def _timeout_error(self, deadline: tuple[float, str]) -> EvaluationTimeoutError:
+        return EvaluationTimeoutError(
+            f"Exceeded the {deadline[1]} after {self.conversation.turns} turn(s)."
+        )
+
+    def _call_with_deadline(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call a blocking function, giving up on it once the next deadline passes.
+
+        Without a timeout the function is called directly. Otherwise it runs in a
+        daemon thread, which is left behind if the deadline passes first. The trace
+        steps and token counts of the call are only applied once it returns.
+
+        Args:
+            fn (Callable[..., Any]): The function to call.
+
+        Returns:
+            Any: The return value of the function.
+
+        Raises:
+            EvaluationTimeoutError: If the deadline passes before the function returns.
+        """
+        deadline = self._next_deadline()
+        if deadline is None:
+            return fn(*args, **kwargs)
+
+        future, record = self._run_recorded(fn, *args, **kwargs)
+        done, _ = concurrent.futures.wait(
+            [future], timeout=max(deadline[0] - time.monotonic(), 0)
+        )
+        if not done:
+            raise self._timeout_error(deadline)
+        self._apply_call_record(record)
+        return future.result()
+
+    def _run_recorded(
+        self, fn: Callable[..., Any], *args, **kwargs
+    ) -> tuple[concurrent.futures.Future, _CallRecord]:
+        # the trace steps and token counts of the call go to its record
+        record = _CallRecord()
+
+        def call():
+            self._call_local.record = record
+            with self.trace.collect_steps(record.steps):
+                return fn(*args, **kwargs)
+
+        return _run_in_daemon_thread(call), record
+
+    def _apply_call_record(self, record: _CallRecord):
+        # applied to the record of the calling thread if it runs a recorded call itself
+        self.trace.extend(record.steps)
+        self._count_tokens(*record.token_counts)
+        for call in record.discarded:
+            self._discard_background_call(call)
+
+    def _call_in_background(
+        self, fn: Callable[..., Any], *args, **kwargs
+    ) -> tuple[concurrent.futures.Future, _CallRecord]:
+        """Start a blocking call in a daemon thread.
+
+        Used to overlap independent model calls of the same test. The call is either
+        used with `_use_background_call`, which applies its trace steps and token
+        counts, or given up with `_discard_background_call`. A discarded call is not
+        interrupted: its tokens are counted when the test ends, and its trace steps are
+        left out.
+
+        Args:
+            fn (Callable[..., Any]): The function to call.
+
+        Returns:
+            tuple[concurrent.futures.Future, _CallRecord]: The future result of the
+                function and the record of its trace steps and token counts.
+        """
+        return self._run_recorded(fn, *args, **kwargs)
+
+    def _use_background_call(
+        self, call: tuple[concurrent.futures.Future, _CallRecord]
+    ) -> Any:
+        future, record = call
+        try:
+            return future.result()
+        finally:
+            self._apply_call_record(record)
+
+    def _discard_background_call(
+        self, call: tuple[concurrent.futures.Future, _CallRecord]
+    ):
+        # kept with the record of the calling thread, so it is dropped if that call is abandoned
+        record = getattr(self._call_local, "record", None)
+        with self._token_count_lock:
+            if record is not None:
+                record.discarded.append(call)
+            else:
+                self._discarded_calls.append(call)
+
+    def _settle_discarded_calls(self):
+        """Wait for the discarded background calls and count their tokens.
+
+        Calls still running when the next deadline passes are abandoned, and their
+        tokens are not counted.
+        """
+        with self._token_count_lock:
+            calls, self._discarded_calls = self._discarded_calls, []
+        if not calls:
+            return
+
+        deadline = self._next_deadline()
+        done, _ = concurrent.futures.wait(
+            [future for future, _ in calls],
+            timeout=None if deadline is None else max(deadline[0] - time.monotonic(), 0),
+        )
+        for future, record in calls:
+            if future in done:
+                self._count_tokens(*record.token_counts)
+
     def _get_hook_cls(self, hook: Optional[str]) -> Optional[type[Hook]]:
         if hook:
             hook_cls = import_class(hook, parent_class=Hook)
@@ -108,7 +394,26 @@ class BaseEvaluator(ABC):
         Returns:
             dict: The response from the model invocation.
 
+        Raises:
+            ResponseCacheMissError: If the response cache replays responses and the request
+                has not been recorded.
+
         """
+        if not self.response_cache:
+            return self._invoke_model(request_body)
+
+        # cached responses did not use the quota and are not counted as evaluator tokens
+        entry = self.response_cache.fetch(
+            self.response_cache.key(self.model_config.model_id, request_body),
+            lambda: encode_response(self._invoke_model(request_body)),
+            self.response_cache_mode,
+        )
+        return decode_response(entry)
+
+    def _invoke_model(self, request_body: dict) -> dict:
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
         response = self.bedrock_runtime_client.invoke_model(
             modelId=self.model_config.model_id, body=json.dumps(request_body)
         )
@@ -117,16 +422,143 @@ class BaseEvaluator(ABC):
 
         return response
 
+    def invoke_model_with_response_stream(self, request_body: dict) -> Iterator[dict]:
+        """
+        Invoke the Bedrock model with the `InvokeModelWithResponseStream` API and
+        iterate over the decoded chunks of the response.
+
+        Closing the iterator before the end of the response stops reading it. The input
+        token counts are then taken from the start of the response, and the output tokens
+        from the last usage reported in the stream, or else estimated from the length of
+        the text read, in which case they are also added to `estimated_output_token_count`.
+
+        Args:
+            request_body (dict): The request payload as a dictionary.
+
+        Returns:
+            Iterator[dict]: The chunks of the response.
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        response = self.bedrock_runtime_client.invoke_model_with_response_stream(
+            modelId=self.model_config.model_id, body=json.dumps(request_body)
+        )
+        stream = response["body"]
+
+        counts = {"input": 0, "output": 0, "cache_read": 0, "cache_write": 0}
+        reported_output = None
+        num_chars = 0
+        complete = False
+        try:
+            for event in stream:
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+                data = json.loads(chunk["bytes"])
+
+                metrics = data.get("amazon-bedrock-invocationMetrics")
+                if metrics:
+                    counts = {
+                        "input": metrics.get("inputTokenCount", 0),
+                        "output": metrics.get("outputTokenCount", 0),
+                        "cache_read": metrics.get("cacheReadInputTokenCount", 0),
+                        "cache_write": metrics.get("cacheWriteInputTokenCount", 0),
+                    }
+                    complete = True
+                elif data.get("type") == "message_start":
+                    usage = data.get("message", {}).get("usage", {})
+                    counts["input"] = usage.get("input_tokens", 0)
+                    counts["cache_read"] = usage.get("cache_read_input_tokens", 0)
+                    counts["cache_write"] = usage.get("cache_creation_input_tokens", 0)
+                elif data.get("type") == "content_block_delta":
+                    delta = data.get("delta", {})
+                    num_chars += len(delta.get("text") or delta.get("thinking") or "")
+                elif data.get("type") == "message_delta":
+                    reported_output = data.get("usage", {}).get("output_tokens")
+                elif "generation" in data:
+                    num_chars += len(data["generation"] or "")
+                    counts["input"] = data.get("prompt_token_count") or counts["input"]
+                    reported_output = data.get("generation_token_count", reported_output)
+
+                yield data
+        finally:
+            estimated_output = 0
+            if not complete:
+                stream.close()
+                if reported_output is not None:
+                    counts["output"] = reported_output
+                else:
+                    estimated_output = -(-num_chars // _CHARS_PER_TOKEN)
+                    counts["output"] = estimated_output
+            self._add_token_counts(
+                counts["input"],
+                counts["output"],
+                counts["cache_read"],
+                counts["cache_write"],
+                estimated_output,
+            )
+
     def _incr_token_counts(self, response: dict):
         headers = response["ResponseMetadata"]["HTTPHeaders"]
 
-        self.input_token_count += int(
-            headers.get("x-amzn-bedrock-input-token-count", 0)
+        self._add_token_counts(
+            int(headers.get("x-amzn-bedrock-input-token-count", 0)),
+            int(headers.get("x-amzn-bedrock-output-token-count", 0)),
+            int(headers.get("x-amzn-bedrock-cache-read-input-token-count", 0)),
+            int(headers.get("x-amzn-bedrock-cache-write-input-token-count", 0)),
         )
-        self.output_token_count += int(
-            headers.get("x-amzn-bedrock-output-token-count", 0)
+
+    def _add_token_counts(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int,
+        cache_write_tokens: int,
+        estimated_output_tokens: int = 0,
+    ):
+        # the quota is charged even if the call is abandoned, as the tokens were used
+        if self.rate_limiter:
+            self.rate_limiter.charge_tokens(input_tokens + output_tokens)
+
+        self._count_tokens(
+            input_tokens,
+            output_tokens,
+            cache_read_tokens,
+            cache_write_tokens,
+            estimated_output_tokens,
         )
 
+    def _count_tokens(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int,
+        cache_write_tokens: int,
+        estimated_output_tokens: int,
+    ):
+        record = getattr(self._call_local, "record", None)
+        if record is not None:
+            for i, count in enumerate(
+                (
+                    input_tokens,
+                    output_tokens,
+                    cache_read_tokens,
+                    cache_write_tokens,
+                    estimated_output_tokens,
+                )
+            ):
+                record.token_counts[i] += count
+            return
+
+        # model calls of a test may run concurrently, see `_call_in_background`
+        with self._token_count_lock:
+            self.input_token_count += input_tokens
+            self.output_token_count += output_tokens
+            self.estimated_output_token_count += estimated_output_tokens
+            self.cache_read_token_count += cache_read_tokens
+            self.cache_write_token_count += cache_write_tokens
+
     def run(self) -> TestResult:
         """
         Run the evaluator within a trace context manager and run hooks
@@ -142,7 +574,42 @@ class BaseEvaluator(ABC):
             if hook_cls:
                 hook_cls.pre_evaluate(self.test, self.trace)
             self.test_result = self.evaluate()
+            self._settle_discarded_calls()
+            if hook_cls and not self.test_result.pending_evaluation:
+                hook_cls.post_evaluate(self.test, self.test_result, self.trace)
+
+        self._set_result_times()
+        return self.test_result
+
+    def run_evaluation(self, pending_result: TestResult) -> TestResult:
+        """
+        Evaluate the conversation of a result pending evaluation, appending the
+        evaluation to the trace of the test. The `post_evaluate` hook, which is not
+        run while the evaluation is pending, is run with the final result.
+
+        Args:
+            pending_result (TestResult): The result of a test run with `defer_evaluation`.
+
+        Returns:
+            TestResult
+        """
+        if not self.supports_deferred_evaluation:
+            raise ValueError(
+                f"{type(self).__name__} does not support deferred evaluation"
+            )
+
+        hook_cls = self._get_hook_cls(self.test.hook)
+
+        self.conversation = pending_result.conversation
+        self.trace.load()
+        with self.trace:
+            self.test_result = self.evaluate_conversation()
             if hook_cls:
                 hook_cls.post_evaluate(self.test, self.test_result, self.trace)
 
+        self._set_result_times()
         return self.test_result
+
+    def _set_result_times(self):
+        self.test_result.start_time = self.trace.start_time
+        self.test_result.end_time = self.trace.end_time
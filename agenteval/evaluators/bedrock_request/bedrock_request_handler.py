@@ -1,7 +1,8 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+import copy
 import json
-from typing import Dict
+from typing import Dict, List, Optional
 
 from agenteval.evaluators.model_config.bedrock_model_config import (
     BedrockModelConfig,
@@ -9,6 +10,10 @@ from agenteval.evaluators.model_config.bedrock_model_config import (
 )
 
 
+def _cached_text_block(text: str) -> Dict:
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+
 class BedrockRequestHandler:
     """
     Static class for building requests to and receiving requests from Bedrock depending on the model
@@ -21,7 +26,23 @@ class BedrockRequestHandler:
         model_config: BedrockModelConfig,
         system_prompt: str,
         prompt: str,
+        prompt_caching: bool = False,
+        cache_boundary: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        stop_sequences: Optional[List[str]] = None,
     ) -> Dict:
+        """
+        Build the request body for a model call.
+
+        With `prompt_caching`, Anthropic requests mark the system prompt and the part of
+        the prompt before `cache_boundary` as cache points, so Bedrock can reuse them
+        across calls. Models of other providers ignore it.
+
+        `max_tokens` overrides the output limit of the body. `stop_sequences` are only
+        sent to Anthropic models, as Bedrock does not accept them for Meta models.
+        """
+        # the configured body is shared by every evaluator of the run
+        request_body = copy.deepcopy(request_body)
         if model_config.provider == ModelProvider.META:
             # Source for approach: https://www.llama.com/docs/model-cards-and-prompt-formats/llama3_3/
             request_body["prompt"] = (
@@ -29,10 +50,25 @@ class BedrockRequestHandler:
                 f"<|eot_id|><|start_header_id|>user<|end_header_id|>{prompt}"
                 "<|eot_id|><|start_header_id|>assistant<|end_header_id|>"
             )
+            if max_tokens:
+                request_body["max_gen_len"] = max_tokens
         elif model_config.provider == ModelProvider.ANTHROPIC:
-            request_body["system"] = system_prompt
+            if prompt_caching:
+                request_body["system"] = [_cached_text_block(system_prompt)]
+            else:
+                request_body["system"] = system_prompt
             if "messages" in request_body:
-                request_body["messages"][0]["content"][0]["text"] = prompt
+                if prompt_caching and cache_boundary:
+                    request_body["messages"][0]["content"] = [
+                        _cached_text_block(prompt[:cache_boundary]),
+                        {"type": "text", "text": prompt[cache_boundary:]},
+                    ]
+                else:
+                    request_body["messages"][0]["content"][0]["text"] = prompt
+            if max_tokens:
+                request_body["max_tokens"] = max_tokens
+            if stop_sequences:
+                request_body["stop_sequences"] = list(stop_sequences)
         return request_body
 
     @staticmethod
@@ -43,5 +79,25 @@ class BedrockRequestHandler:
         if model_config.provider == ModelProvider.META:
             completion = json.loads(response_body)["generation"]
         elif model_config.provider == ModelProvider.ANTHROPIC:
-            completion = json.loads(response_body)["content"][0]["text"]
+            body = json.loads(response_body)
+            completion = body["content"][0]["text"] if body["content"] else ""
+            # the matched stop sequence is not part of the text, but may close a tag
+            if body.get("stop_reason") == "stop_sequence":
+                completion += body.get("stop_sequence") or ""
         return completion
+
+    @staticmethod
+    def parse_completion_from_stream_chunk(
+        chunk: Dict, model_config: BedrockModelConfig
+    ) -> str:
+        """Get the text generated in a chunk of a streamed response."""
+        if model_config.provider == ModelProvider.META:
+            return chunk.get("generation") or ""
+        elif model_config.provider == ModelProvider.ANTHROPIC:
+            if chunk.get("type") == "content_block_delta":
+                return chunk["delta"].get("text", "")
+            if chunk.get("type") == "message_delta":
+                delta = chunk.get("delta", {})
+                if delta.get("stop_reason") == "stop_sequence":
+                    return delta.get("stop_sequence") or ""
+            return ""
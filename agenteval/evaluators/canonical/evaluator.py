@@ -1,14 +1,16 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import contextlib
 import logging
 import os
 import re
-from typing import Tuple
+from typing import Optional, Tuple
 import uuid
 
 from agenteval import jinja_env
 from agenteval.evaluators import BaseEvaluator
+from agenteval.evaluators.exceptions import EvaluationTimeoutError
 from agenteval.evaluators.bedrock_request.bedrock_request_handler import (
     BedrockRequestHandler,
 )
@@ -28,6 +30,13 @@ _PROMPT_TEMPLATE_NAMES = [
     "generate_evaluation",
 ]
 
+# the runtime prompts list the steps or expected results before the conversation,
+# so everything up to this marker stays the same across the calls of a test
+_CACHE_BOUNDARY_MARKER = "<conversation>"
+
+# `status_check_min_turns` value that waits for as many turns as there are steps
+_STATUS_CHECK_AFTER_STEPS = "steps"
+
 # enable backwards-compatible StrEnum
 try:
     from enum import StrEnum
@@ -56,17 +65,30 @@ class Results(StrEnum):
     NOT_ALL_EXPECTED_RESULTS_OBSERVED = (
         "Not all of the expected results can be observed in the conversation."
     )
+    CANCELLED = "Test cancelled before completion."
+    TIMED_OUT = "Test timed out before completion."
+    AWAITING_EVALUATION = "All steps attempted, awaiting evaluation."
 
 
 class CanonicalEvaluator(BaseEvaluator):
     """An evaluator based on the canoncial templates. Compatible with the model providers supported in BedrockModelConfig"""
 
+    supports_deferred_evaluation = True
+
     def __init__(
         self,
+        speculative_user_response: bool = False,
         **kwargs,
     ):
-        """Initialize the evaluator."""
+        """Initialize the evaluator.
+
+        Args:
+            speculative_user_response (bool): Whether to generate the next user response
+                concurrently with the test status. The response is discarded if all steps
+                have been attempted, trading its tokens for one less serial model call per turn.
+        """
         super().__init__(**kwargs)
+        self.speculative_user_response = speculative_user_response
 
         self._prompt_template_map = {
             name: {
@@ -93,39 +115,86 @@ class CanonicalEvaluator(BaseEvaluator):
             content.append(match.group(1).strip() if match else None)
         return tuple(content)
 
-    def _generate(
+    def _render_system_prompt(self, call_type: str) -> str:
+        return self._prompt_template_map[call_type]["system"].render(
+            thinking=self.model_config.call_budget(call_type).thinking
+        )
+
+    def _complete(
         self,
         system_prompt: str,
         prompt: str,
-        output_xml_element: str,
+        output_xml_elements: Optional[list[str]] = None,
+        call_type: Optional[str] = None,
     ) -> str:
+        # the generation settings configured for the call type in `call_budgets`
+        budget = self.model_config.call_budget(call_type)
         request_body = BedrockRequestHandler.build_request_body(
             request_body=self.model_config.request_body,
             model_config=self.model_config,
             system_prompt=system_prompt,
             prompt=prompt,
+            prompt_caching=self.prompt_caching,
+            cache_boundary=max(prompt.find(_CACHE_BOUNDARY_MARKER), 0),
+            max_tokens=budget.max_tokens,
+            stop_sequences=budget.stop_sequences,
         )
 
-        response = self.invoke_model(request_body=request_body)
+        if output_xml_elements and not budget.thinking:
+            # the reasoning was not asked for, so the stream does not wait for it
+            output_xml_elements = [e for e in output_xml_elements if e != "thinking"]
 
-        completion = BedrockRequestHandler.parse_completion_from_response(
-            response=response, model_config=self.model_config
-        )
+        if self.streaming and output_xml_elements and not self.response_cache:
+            completion = self._stream_completion(request_body, output_xml_elements)
+        else:
+            response = self.invoke_model(request_body=request_body)
+            completion = BedrockRequestHandler.parse_completion_from_response(
+                response=response, model_config=self.model_config
+            )
 
         logger.debug(
             f"[{self.test.name}]\n[PROMPT]\n{prompt}\n[COMPLETION]\n{completion}"
         )
 
+        return completion
+
+    def _stream_completion(
+        self, request_body: dict, output_xml_elements: list[str]
+    ) -> str:
+        # stop reading once every element the caller extracts has been closed
+        closing_tags = [f"</{e}>" for e in output_xml_elements]
+        completion = ""
+        with contextlib.closing(
+            self.invoke_model_with_response_stream(request_body)
+        ) as chunks:
+            for chunk in chunks:
+                completion += BedrockRequestHandler.parse_completion_from_stream_chunk(
+                    chunk=chunk, model_config=self.model_config
+                )
+                if all(tag in completion for tag in closing_tags):
+                    break
+        return completion
+
+    def _generate(
+        self,
+        system_prompt: str,
+        prompt: str,
+        output_xml_element: str,
+        call_type: Optional[str] = None,
+    ) -> str:
+        output_xml_elements = [output_xml_element, "thinking"]
+        completion = self._complete(
+            system_prompt, prompt, output_xml_elements, call_type
+        )
+
         output, reasoning = self._extract_content_from_xml(
-            completion, [output_xml_element, "thinking"]
+            completion, output_xml_elements
         )
 
         return output, reasoning
 
     def _generate_initial_prompt(self) -> str:
-        system_prompt = self._prompt_template_map["generate_initial_prompt"][
-            "system"
-        ].render()
+        system_prompt = self._render_system_prompt("generate_initial_prompt")
         prompt = self._prompt_template_map["generate_initial_prompt"]["prompt"].render(
             step=self.test.steps[0]
         )
@@ -134,6 +203,7 @@ class CanonicalEvaluator(BaseEvaluator):
             system_prompt=system_prompt,
             prompt=prompt,
             output_xml_element="initial_prompt",
+            call_type="generate_initial_prompt",
         )
 
         self.trace.add_step(
@@ -145,9 +215,13 @@ class CanonicalEvaluator(BaseEvaluator):
         return initial_prompt
 
     def _generate_test_status(self) -> str:
-        system_prompt = self._prompt_template_map["generate_test_status"][
-            "system"
-        ].render()
+        test_status, step = self._draft_test_status()
+        self.trace.add_step(**step)
+        return test_status
+
+    def _draft_test_status(self) -> tuple[str, dict]:
+        # the trace step is returned so that concurrent calls are traced in order
+        system_prompt = self._render_system_prompt("generate_test_status")
         prompt = self._prompt_template_map["generate_test_status"]["prompt"].render(
             steps=self.test.steps, conversation=self.conversation
         )
@@ -155,19 +229,18 @@ class CanonicalEvaluator(BaseEvaluator):
             system_prompt=system_prompt,
             prompt=prompt,
             output_xml_element="category",
+            call_type="generate_test_status",
         )
-        self.trace.add_step(
+        return test_status, dict(
+            step_name="_generate_test_status",
             system_prompt=system_prompt,
             prompt=prompt,
             test_status=test_status,
             reasoning=reasoning,
         )
-        return test_status
 
     def _generate_evaluation(self) -> tuple[str, str]:
-        system_prompt = self._prompt_template_map["generate_evaluation"][
-            "system"
-        ].render()
+        system_prompt = self._render_system_prompt("generate_evaluation")
         prompt = self._prompt_template_map["generate_evaluation"]["prompt"].render(
             expected_results=self.test.expected_results,
             conversation=self.conversation,
@@ -177,6 +250,7 @@ class CanonicalEvaluator(BaseEvaluator):
             system_prompt=system_prompt,
             prompt=prompt,
             output_xml_element="category",
+            call_type="generate_evaluation",
         )
         self.trace.add_step(
             system_prompt=system_prompt,
@@ -188,9 +262,12 @@ class CanonicalEvaluator(BaseEvaluator):
         return evaluation, reasoning
 
     def _generate_user_response(self) -> str:
-        system_prompt = self._prompt_template_map["generate_user_response"][
-            "system"
-        ].render()
+        user_response, step = self._draft_user_response()
+        self.trace.add_step(**step)
+        return user_response
+
+    def _draft_user_response(self) -> tuple[str, dict]:
+        system_prompt = self._render_system_prompt("generate_user_response")
         prompt = self._prompt_template_map["generate_user_response"]["prompt"].render(
             steps=self.test.steps, conversation=self.conversation
         )
@@ -199,36 +276,171 @@ class CanonicalEvaluator(BaseEvaluator):
             system_prompt=system_prompt,
             prompt=prompt,
             output_xml_element="user_response",
+            call_type="generate_user_response",
         )
 
-        self.trace.add_step(
+        return user_response, dict(
+            step_name="_generate_user_response",
             system_prompt=system_prompt,
             prompt=prompt,
             user_response=user_response,
             reasoning=reasoning,
         )
-        return user_response
+
+    def _speculate(self) -> bool:
+        # no user response follows the last turn
+        return (
+            self.speculative_user_response
+            and self.conversation.turns < self.test.max_turns
+        )
+
+    def _status_check_skip_reason(self) -> Optional[str]:
+        """Get why the test status is not checked at this turn, if it is not.
+
+        The test's `status_check_min_turns` and `status_check_every_turns` set when the
+        status is checked. It is always checked at the last turn.
+        """
+        turns = self.conversation.turns
+        if turns >= self.test.max_turns:
+            return None
+
+        min_turns = self.test.status_check_min_turns or 1
+        if min_turns == _STATUS_CHECK_AFTER_STEPS:
+            min_turns = len(self.test.steps)
+        if turns < min_turns:
+            return f"The status is first checked after {min_turns} turn(s)."
+
+        every = self.test.status_check_every_turns
+        if every and (turns - min_turns) % every:
+            return f"The status is checked every {every} turn(s)."
+        return None
+
+    def _skip_test_status(self, reason: str):
+        self.trace.add_step(turn=self.conversation.turns, reason=reason)
+
+    def _next_test_status(self) -> tuple[Optional[str], Optional[str]]:
+        """Get the test status and, when speculating, the next user response.
+
+        The user response is drafted concurrently with the status and discarded if
+        all steps have been attempted, in which case only its tokens are counted. A
+        skipped status check is traced and returns no status.
+        """
+        skip_reason = self._status_check_skip_reason()
+        if skip_reason:
+            self._skip_test_status(skip_reason)
+            return None, None
+
+        if not self._speculate():
+            return self._generate_test_status(), None
+
+        draft = self._call_in_background(self._draft_user_response)
+        try:
+            test_status = self._generate_test_status()
+        except BaseException:
+            self._discard_background_call(draft)
+            raise
+        if test_status == TestStatusCategories.ALL_STEPS_ATTEMPTED:
+            self._discard_background_call(draft)
+            return test_status, None
+
+        user_response, step = self._use_background_call(draft)
+        self.trace.add_step(**step)
+        return test_status, user_response
+
+    def _target_overrides(self) -> dict:
+        return {
+            "prompt_session_overrides": getattr(self.test, "bedrock_prompt_session_attributes", {}) or {},
+            "session_overrides": getattr(self.test, "bedrock_session_attributes", {}) or {},
+        }
 
     def _invoke_target_full(self, user_input):
         # Like _invoke_target, but returns the full TargetResponse (not just response string)
-        target_response = self.target.invoke(
-            user_input,
-            prompt_session_overrides=getattr(self.test, "bedrock_prompt_session_attributes", {}) or {},
-            session_overrides=getattr(self.test, "bedrock_session_attributes", {}) or {},
-        )
+        target_response = self.target.invoke(user_input, **self._target_overrides())
         self.trace.add_step(data=target_response.data)
         return target_response
 
     def _invoke_target(self, user_input) -> str:
-        target_response = self.target.invoke(
-            user_input,
-            prompt_session_overrides=getattr(self.test, "bedrock_prompt_session_attributes", {}) or {},
-            session_overrides=getattr(self.test, "bedrock_session_attributes", {}) or {},
-        )
+        target_response = self.target.invoke(user_input, **self._target_overrides())
         self.trace.add_step(data=target_response.data)
 
         return target_response.response
 
+    def _start_conversation(self, user_input: str, target_response) -> str:
+        # Extraer conversation_id real
+        conversation_id = (
+            target_response.data.get("conversationId") or
+            target_response.data.get("sessionId") or
+            str(uuid.uuid4())
+        )
+
+        # Inicializar Conversation con ese ID real
+        self.conversation = Conversation(conversation_id=conversation_id)
+        self.conversation.add_turn(user_input, target_response.response)
+
+        return conversation_id
+
+    @staticmethod
+    def _classify_evaluation(eval_category: str) -> tuple[bool, str]:
+        if eval_category == EvaluationCategories.NOT_ALL_EXPECTED_RESULTS_OBSERVED.value:
+            return False, Results.NOT_ALL_EXPECTED_RESULTS_OBSERVED.value
+        return True, Results.ALL_EXPECTED_RESULTS_OBSERVED.value
+
+    def _build_result(
+        self, passed: bool, result: str, reasoning: str, conversation_id: str
+    ) -> TestResult:
+        return TestResult(
+            test_name=self.test.name,
+            passed=passed,
+            result=result,
+            reasoning=(reasoning or ""),
+            conversation=self.conversation,
+            conversation_id=conversation_id
+        )
+
+    def _build_pending_result(self, conversation_id: str) -> TestResult:
+        return TestResult(
+            test_name=self.test.name,
+            passed=False,
+            pending_evaluation=True,
+            result=Results.AWAITING_EVALUATION.value,
+            reasoning=f"All steps were attempted after {self.conversation.turns} turn(s).",
+            conversation=self.conversation,
+            conversation_id=conversation_id,
+        )
+
+    def _build_cancelled_result(self, conversation_id: str) -> TestResult:
+        return TestResult(
+            test_name=self.test.name,
+            passed=False,
+            skipped=True,
+            result=Results.CANCELLED.value,
+            reasoning=f"The run was stopped after {self.conversation.turns} turn(s).",
+            conversation=self.conversation,
+            conversation_id=conversation_id,
+        )
+
+    def _build_timeout_result(
+        self, e: EvaluationTimeoutError, conversation_id: str
+    ) -> TestResult:
+        return TestResult(
+            test_name=self.test.name,
+            passed=False,
+            result=Results.TIMED_OUT.value,
+            reasoning=str(e),
+            conversation=self.conversation,
+            conversation_id=conversation_id,
+        )
+
+    def _build_exception_result(self, e: Exception) -> TestResult:
+        return TestResult(
+            test_name=self.test.name,
+            passed=False,
+            result="Failed due to exception",
+            reasoning=str(e),
+            conversation=Conversation(conversation_id="UNKNOWN"),
+            conversation_id="UNKNOWN"
+        )
+
     def evaluate(self) -> TestResult:
         """Conduct the test.
 
@@ -238,63 +450,72 @@ class CanonicalEvaluator(BaseEvaluator):
         passed = False
         result = Results.MAX_TURNS_REACHED.value
         reasoning = ""
+        conversation_id = "UNKNOWN"
 
         try:
+            self._start_test_clock()
+            self._start_turn_clock()
             self.target.start_new_session()
             # --- Preparar y hacer el primer turno (para obtener ConversationId real) ---
             if self.test.initial_prompt:
                 user_input = self.test.initial_prompt
             else:
-                user_input = self._generate_initial_prompt()
+                user_input = self._call_with_deadline(self._generate_initial_prompt)
             # Realizar la primera invocación y capturar el TargetResponse COMPLETO
-            target_response = self._invoke_target_full(user_input)
-            # Extraer conversation_id real
-            conversation_id = (
-                target_response.data.get("conversationId") or
-                target_response.data.get("sessionId") or
-                str(uuid.uuid4())
+            target_response = self._call_with_deadline(
+                self._invoke_target_full, user_input
             )
-
-            # Inicializar Conversation con ese ID real
-            self.conversation = Conversation(conversation_id=conversation_id)
-            self.conversation.add_turn(user_input, target_response.response)
+            conversation_id = self._start_conversation(user_input, target_response)
+            user_input = None
 
             while self.conversation.turns < self.test.max_turns:
-                if self.conversation.turns == 0:
-                    # Ya procesada arriba
-                    pass
-                else:
-                    user_input = self._generate_user_response()
-                    self.conversation.add_turn(user_input, self._invoke_target(user_input))
-
-                test_status = self._generate_test_status()
+                if self.cancelled:
+                    return self._build_cancelled_result(conversation_id)
+
+                self._start_turn_clock()
+                if user_input is None:
+                    user_input = self._call_with_deadline(self._generate_user_response)
+                self.conversation.add_turn(
+                    user_input, self._call_with_deadline(self._invoke_target, user_input)
+                )
+
+                test_status, user_input = self._call_with_deadline(
+                    self._next_test_status
+                )
                 if test_status == TestStatusCategories.ALL_STEPS_ATTEMPTED:
-                    eval_category, reasoning = self._generate_evaluation()
-                    if (
-                        eval_category
-                        == EvaluationCategories.NOT_ALL_EXPECTED_RESULTS_OBSERVED.value 
-                    ):
-                        result = Results.NOT_ALL_EXPECTED_RESULTS_OBSERVED.value
-                    else:
-                        result = Results.ALL_EXPECTED_RESULTS_OBSERVED.value
-                        passed = True
-
+                    if self.defer_evaluation:
+                        return self._build_pending_result(conversation_id)
+                    eval_category, reasoning = self._call_with_deadline(
+                        self._generate_evaluation
+                    )
+                    passed, result = self._classify_evaluation(eval_category)
                     break
 
-            return TestResult(
-                test_name=self.test.name,
-                passed=passed,
-                result=result,
-                reasoning=(reasoning or ""),
-                conversation=self.conversation,
-                conversation_id=conversation_id
-            )
+            return self._build_result(passed, result, reasoning, conversation_id)
+        except EvaluationTimeoutError as e:
+            return self._build_timeout_result(e, conversation_id)
         except Exception as e:
-            return TestResult(
-                test_name=self.test.name,
-                passed=False,
-                result="Failed due to exception",
-                reasoning=str(e),
-                conversation=Conversation(conversation_id="UNKNOWN"),
-                conversation_id="UNKNOWN"
+            return self._build_exception_result(e)
+
+    def evaluate_conversation(self) -> TestResult:
+        """Evaluate the conversation of a test whose evaluation was deferred.
+
+        The evaluation is bound by the turn timeout, as it would be at the end of
+        the last turn.
+
+        Returns:
+            TestResult
+        """
+        conversation_id = self.conversation.conversation_id
+
+        try:
+            self._start_turn_clock()
+            eval_category, reasoning = self._call_with_deadline(
+                self._generate_evaluation
             )
+            passed, result = self._classify_evaluation(eval_category)
+            return self._build_result(passed, result, reasoning, conversation_id)
+        except EvaluationTimeoutError as e:
+            return self._build_timeout_result(e, conversation_id)
+        except Exception as e:
+            return self._build_exception_result(e)
@@ -0,0 +1,151 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+from typing import Optional
+
+from agenteval import jinja_env
+from agenteval.evaluators.canonical.evaluator import (
+    CanonicalEvaluator,
+    Results,
+    TestStatusCategories,
+)
+from agenteval.evaluators.exceptions import EvaluationTimeoutError
+from agenteval.test import TestResult
+
+_PROMPT_TEMPLATE_ROOT = "evaluators/canonical_fused"
+_SYSTEM_PROMPT_DIR = "system"
+_RUNTIME_PROMPT_DIR = "runtime"
+_FUSED_TEMPLATE_NAME = "generate_status_and_user_response"
+
+
+class CanonicalFusedEvaluator(CanonicalEvaluator):
+    """A canonical evaluator that gets the test status and the next user response
+    from a single model call.
+
+    After each target response, one completion classifies the conversation and
+    writes the next user message, which is only sent if not all steps were attempted.
+    This halves the evaluator calls per turn. The status is also checked after the
+    first turn, so a test can finish as soon as its steps are attempted. The call is
+    traced as a `_generate_test_status` step followed by a `_generate_user_response`
+    step, as in the canonical evaluator.
+    """
+
+    def __init__(
+        self,
+        **kwargs,
+    ):
+        """Initialize the evaluator."""
+        super().__init__(**kwargs)
+
+        self._prompt_template_map[_FUSED_TEMPLATE_NAME] = {
+            "system": jinja_env.get_template(
+                os.path.join(
+                    _PROMPT_TEMPLATE_ROOT,
+                    _SYSTEM_PROMPT_DIR,
+                    f"{_FUSED_TEMPLATE_NAME}.jinja",
+                )
+            ),
+            "prompt": jinja_env.get_template(
+                os.path.join(
+                    _PROMPT_TEMPLATE_ROOT,
+                    _RUNTIME_PROMPT_DIR,
+                    f"{_FUSED_TEMPLATE_NAME}.jinja",
+                )
+            ),
+        }
+
+    def _generate_status_and_user_response(self) -> tuple[str, Optional[str]]:
+        system_prompt = self._render_system_prompt(_FUSED_TEMPLATE_NAME)
+        prompt = self._prompt_template_map[_FUSED_TEMPLATE_NAME]["prompt"].render(
+            steps=self.test.steps, conversation=self.conversation
+        )
+
+        output_xml_elements = ["category", "user_response", "thinking"]
+        completion = self._complete(
+            system_prompt, prompt, output_xml_elements, _FUSED_TEMPLATE_NAME
+        )
+        test_status, user_response, reasoning = self._extract_content_from_xml(
+            completion, output_xml_elements
+        )
+
+        self.trace.add_step(
+            step_name="_generate_test_status",
+            system_prompt=system_prompt,
+            prompt=prompt,
+            test_status=test_status,
+            reasoning=reasoning,
+        )
+        if test_status == TestStatusCategories.ALL_STEPS_ATTEMPTED:
+            return test_status, None
+
+        self.trace.add_step(
+            step_name="_generate_user_response",
+            system_prompt=system_prompt,
+            prompt=prompt,
+            user_response=user_response,
+            reasoning=reasoning,
+        )
+        return test_status, user_response
+
+    def _next_step(self) -> tuple[Optional[str], Optional[str]]:
+        # once the last turn is reached, a user response would never be sent
+        if self.conversation.turns >= self.test.max_turns:
+            return self._generate_test_status(), None
+
+        skip_reason = self._status_check_skip_reason()
+        if skip_reason:
+            self._skip_test_status(skip_reason)
+            return None, self._generate_user_response()
+        return self._generate_status_and_user_response()
+
+    def evaluate(self) -> TestResult:
+        """Conduct the test.
+
+        Returns:
+            TestResult
+        """
+        passed = False
+        result = Results.MAX_TURNS_REACHED.value
+        reasoning = ""
+        conversation_id = "UNKNOWN"
+
+        try:
+            self._start_test_clock()
+            self._start_turn_clock()
+            self.target.start_new_session()
+            if self.test.initial_prompt:
+                user_input = self.test.initial_prompt
+            else:
+                user_input = self._call_with_deadline(self._generate_initial_prompt)
+            target_response = self._call_with_deadline(
+                self._invoke_target_full, user_input
+            )
+            conversation_id = self._start_conversation(user_input, target_response)
+
+            while True:
+                if self.cancelled:
+                    return self._build_cancelled_result(conversation_id)
+
+                self._start_turn_clock()
+                test_status, user_input = self._call_with_deadline(self._next_step)
+                if test_status == TestStatusCategories.ALL_STEPS_ATTEMPTED:
+                    if self.defer_evaluation:
+                        return self._build_pending_result(conversation_id)
+                    eval_category, reasoning = self._call_with_deadline(
+                        self._generate_evaluation
+                    )
+                    passed, result = self._classify_evaluation(eval_category)
+                    break
+                if self.conversation.turns >= self.test.max_turns:
+                    break
+
+                self.conversation.add_turn(
+                    user_input, self._call_with_deadline(self._invoke_target, user_input)
+                )
+
+            return self._build_result(passed, result, reasoning, conversation_id)
+        except EvaluationTimeoutError as e:
+            return self._build_timeout_result(e, conversation_id)
+        except Exception as e:
+            return self._build_exception_result(e)
@@ -1,11 +1,17 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import dataclasses
+import threading
+from typing import Optional
+
 from pydantic import BaseModel
 
 from agenteval.evaluators import BaseEvaluator
-from agenteval.evaluators.canonical.evaluator import CanonicalEvaluator
-from agenteval.evaluators.model_config.bedrock_model_config import BedrockModelConfig
+from agenteval.evaluators.model_config.bedrock_model_config import (
+    BedrockModelConfig,
+    CallBudget,
+)
 from agenteval.evaluators.model_config.preconfigured_model_configs import (
     DEFAULT_CLAUDE_3_5_MODEL_CONFIG,
     DEFAULT_CLAUDE_3_MODEL_CONFIG,
@@ -17,11 +23,16 @@ from agenteval.evaluators.model_config.preconfigured_model_configs import (
 )
 from agenteval.targets import BaseTarget
 from agenteval.test import Test
+from agenteval.utils import import_registered_class
 
+# evaluators are imported on first use, along with their prompt templates
 _EVALUATOR_METHOD_MAP = {
-    "canonical": CanonicalEvaluator,
+    "canonical": "agenteval.evaluators.canonical.evaluator.CanonicalEvaluator",
+    "canonical-fused": "agenteval.evaluators.canonical_fused.evaluator.CanonicalFusedEvaluator",
 }
 
+_DEFAULT_EVAL_METHOD = "canonical"
+
 _DEFAULT_MODEL_CONFIG_MAP = {
     "claude-3": DEFAULT_CLAUDE_3_MODEL_CONFIG,
     "claude-3_5": DEFAULT_CLAUDE_3_5_MODEL_CONFIG,
@@ -43,34 +54,54 @@ class EvaluatorFactory(BaseModel):
 
     config: dict
 
-    def create(self, test: Test, target: BaseTarget, work_dir: str) -> BaseEvaluator:
+    def create(
+        self,
+        test: Test,
+        target: Optional[BaseTarget],
+        work_dir: str,
+        cancel_event: Optional[threading.Event] = None,
+        repetition: Optional[int] = None,
+        defer_evaluation: bool = False,
+    ) -> BaseEvaluator:
         """Create an instance of the evaluator class specified in the configuration.
 
         Args:
             test (Test): The test case.
-            target (BaseTarget): The target agent being evaluated.
+            target (Optional[BaseTarget]): The target agent being evaluated. `None` when
+                the evaluator only evaluates a recorded conversation.
             work_dir (str): The directory where the test result and trace will be
                 generated.
+            cancel_event (Optional[threading.Event]): An event signalling that the test
+                should stop at its next turn boundary.
+            repetition (Optional[int]): The repetition of the test, if the test is repeated.
+            defer_evaluation (bool): Whether the evaluator stops once the conversation is
+                complete, leaving its evaluation to `BaseEvaluator.run_evaluation`.
 
         Returns:
             BaseEvaluator: An instance of the evaluator class, with the configuration
                 parameters applied.
         """
-        reserved_config_keys = {"eval_method", "model", "custom_config"}
+        reserved_config_keys = {"eval_method", "model", "custom_config", "call_budgets"}
         evaluator_cls = self._get_evaluator_class()
         return evaluator_cls(
             test=test,
             target=target,
             work_dir=work_dir,
             model_config=self._get_bedrock_model_config(),
+            cancel_event=cancel_event,
+            repetition=repetition,
+            defer_evaluation=defer_evaluation,
             **{k: v for k, v in self.config.items() if k not in reserved_config_keys},
         )
 
+    @property
+    def supports_deferred_evaluation(self) -> bool:
+        """Whether the configured evaluator class supports deferred evaluation."""
+        return self._get_evaluator_class().supports_deferred_evaluation
+
     def _get_evaluator_class(self) -> type[BaseEvaluator]:
-        if "eval_method" in self.config:
-            return _EVALUATOR_METHOD_MAP[self.config["eval_method"]]
-        else:
-            return CanonicalEvaluator
+        eval_method = self.config.get("eval_method", _DEFAULT_EVAL_METHOD)
+        return import_registered_class(_EVALUATOR_METHOD_MAP[eval_method])
 
     """
     If the use passes in both an id and a request body, create a custom config instance; otherwise use a default config for the specified model
@@ -78,9 +109,24 @@ class EvaluatorFactory(BaseModel):
 
     def _get_bedrock_model_config(self) -> BedrockModelConfig:
         if "custom_config" in self.config:
-            return BedrockModelConfig(
+            model_config = BedrockModelConfig(
                 model_id=self.config["custom_config"]["model_id"],
                 request_body=self.config["custom_config"]["request_body"],
             )
         else:
-            return _DEFAULT_MODEL_CONFIG_MAP[self.config["model"]]
+            model_config = _DEFAULT_MODEL_CONFIG_MAP[self.config["model"]]
+
+        # per-call-type generation settings, e.g. `generate_test_status: {thinking: false}`
+        call_budgets = self.config.get("call_budgets")
+        if call_budgets:
+            model_config = dataclasses.replace(
+                model_config,
+                call_budgets={
+                    **model_config.call_budgets,
+                    **{
+                        call_type: CallBudget(**budget)
+                        for call_type, budget in call_budgets.items()
+                    },
+                },
+            )
+        return model_config
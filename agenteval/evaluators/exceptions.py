@@ -0,0 +1,10 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+
+class EvaluationTimeoutError(Exception):
+    """An exception raised when a test or one of its turns exceeds its timeout."""
+
+    def __init__(self, message="The evaluation timed out"):
+        self.message = message
+        super().__init__(self.message)
@@ -1,6 +1,6 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from .bedrock_model_config import BedrockModelConfig
+from .bedrock_model_config import BedrockModelConfig, CallBudget
 
-__all__ = ["BedrockModelConfig"]
+__all__ = ["BedrockModelConfig", "CallBudget"]
@@ -1,8 +1,8 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict
+from typing import Dict, List, Optional
 
 
 class ModelProvider(Enum):
@@ -10,10 +10,33 @@ class ModelProvider(Enum):
     ANTHROPIC = "anthropic"
 
 
+@dataclass
+class CallBudget:
+    """The generation settings of one type of evaluator call.
+
+    Attributes:
+        max_tokens: The maximum number of output tokens. If `None`, the limit of the
+            request body is used.
+        stop_sequences: Sequences ending the generation, which are kept at the end of the
+            completion. Only Anthropic models support them.
+        thinking: Whether the prompt asks for the reasoning in a `<thinking>` block
+            before the answer.
+    """
+
+    max_tokens: Optional[int] = None
+    stop_sequences: Optional[List[str]] = None
+    thinking: bool = True
+
+
 @dataclass
 class BedrockModelConfig:
     model_id: str
     request_body: Dict
+    # keyed by the name of the prompt template of the call (e.g. `generate_test_status`)
+    call_budgets: Dict[str, CallBudget] = field(default_factory=dict)
+
+    def call_budget(self, call_type: Optional[str]) -> CallBudget:
+        return self.call_budgets.get(call_type) or CallBudget()
 
     """
     Match the provider by looking for the provider name in the model_id.
@@ -1,6 +1,12 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import math
+import statistics
+
+# z-score of a two-sided 95% confidence level
+_Z_95 = 1.96
+
 
 def calculate_pass_rate_metric(pass_count: int, num_tests: int) -> float:
     """Calculate the pass rate metric.
@@ -13,3 +19,54 @@ def calculate_pass_rate_metric(pass_count: int, num_tests: int) -> float:
         float: The pass rate metric.
     """
     return round((pass_count / num_tests) * 100, 2)
+
+
+def calculate_wilson_interval(
+    pass_count: int, num_runs: int, z: float = _Z_95
+) -> tuple[float, float]:
+    """Calculate the Wilson score interval of a pass rate.
+
+    Unlike the normal approximation, the interval stays within 0-100 % and remains
+    meaningful for the small number of repetitions typically run per test.
+
+    Args:
+        pass_count (int): The number of runs that passed.
+        num_runs (int): The total number of runs.
+        z (float): The z-score of the confidence level. Defaults to 95 %.
+
+    Returns:
+        tuple[float, float]: The lower and upper bounds of the pass rate, in percent.
+    """
+    if not num_runs:
+        return 0.0, 0.0
+
+    p = pass_count / num_runs
+    z2 = z * z
+    denominator = 1 + z2 / num_runs
+    center = (p + z2 / (2 * num_runs)) / denominator
+    margin = (
+        z * math.sqrt(p * (1 - p) / num_runs + z2 / (4 * num_runs * num_runs))
+    ) / denominator
+
+    return (
+        round(max(0.0, center - margin) * 100, 2),
+        round(min(1.0, center + margin) * 100, 2),
+    )
+
+
+def calculate_latency_spread(durations: list[float]) -> tuple[float, float, float]:
+    """Calculate the spread of run durations.
+
+    Args:
+        durations (list[float]): The durations of the runs in seconds.
+
+    Returns:
+        tuple[float, float, float]: The minimum, median and maximum duration in seconds.
+    """
+    if not durations:
+        return 0.0, 0.0, 0.0
+    return (
+        round(min(durations), 2),
+        round(statistics.median(durations), 2),
+        round(max(durations), 2),
+    )
@@ -2,5 +2,6 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from .plan import Plan
+from .runner import PlanRun, PlanRunner
 
-__all__ = ["Plan"]
+__all__ = ["Plan", "PlanRun", "PlanRunner"]
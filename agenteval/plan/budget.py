@@ -0,0 +1,215 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import os
+import secrets
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Optional
+
+# environment variable through which runs find the budget shared by their parent
+BUDGET_ENV = "AGENTEVAL_CONVERSATION_BUDGET"
+
+_HOST = "127.0.0.1"
+
+# how long a client waits for the server's answer beyond its own timeout
+_REPLY_MARGIN = 5.0
+
+# how often a pending lease request checks whether its waiter gave up
+_CANCEL_CHECK_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationBudgetServer:
+    """Serves a limit on the number of concurrent conversations shared by several processes.
+
+    The server holds a semaphore in the current process and exposes it on the loopback
+    interface. Runs started with the variables returned by `environ` in their
+    environment take a slot before each test and give it back when the test ends, so
+    the limit holds across all of them.
+
+    Each slot is leased over its own connection and is freed as soon as the connection
+    closes, so the slots of a process that is killed go back to the budget.
+
+    Attributes:
+        max_conversations (int): The maximum number of concurrent conversations.
+    """
+
+    def __init__(self, max_conversations: int):
+        """Initialize the server.
+
+        Args:
+            max_conversations (int): The maximum number of concurrent conversations.
+        """
+        if max_conversations < 1:
+            raise ValueError("max_conversations must be at least 1")
+
+        self.max_conversations = max_conversations
+        self._authkey = secrets.token_bytes(16)
+        self._semaphore = threading.BoundedSemaphore(max_conversations)
+        self._listener = None
+
+    def start(self):
+        """Start serving the budget from a background thread."""
+        self._listener = Listener(address=(_HOST, 0), authkey=self._authkey)
+        threading.Thread(target=self._serve_forever, daemon=True).start()
+
+    def _serve_forever(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError):
+                continue
+            except OSError:
+                # the listener was closed
+                return
+            threading.Thread(target=self._serve_lease, args=(conn,), daemon=True).start()
+
+    def _serve_lease(self, conn):
+        with conn:
+            try:
+                timeout = conn.recv()
+            except (EOFError, OSError):
+                return
+            acquired = self._wait_for_slot(conn, timeout)
+            try:
+                if not acquired:
+                    conn.send(False)
+                    return
+                conn.send(True)
+                # the lease lasts until the client releases it or its connection drops
+                conn.recv()
+            except (EOFError, OSError):
+                pass
+            finally:
+                if acquired:
+                    self._semaphore.release()
+
+    def _wait_for_slot(self, conn, timeout: Optional[float]) -> bool:
+        # a client that gives up closes its connection, which ends the wait
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = _CANCEL_CHECK_INTERVAL
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0))
+            if self._semaphore.acquire(timeout=wait):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            try:
+                if conn.poll(0):
+                    # nothing else is sent while a request is pending, so this is EOF
+                    conn.recv()
+            except (EOFError, OSError):
+                return False
+
+    def environ(self) -> dict[str, str]:
+        """Get the environment variables that connect a run to this budget.
+
+        Returns:
+            dict[str, str]
+        """
+        if self._listener is None:
+            raise RuntimeError("The budget server has not been started")
+
+        host, port = self._listener.address
+        return {BUDGET_ENV: f"{host}:{port}:{self._authkey.hex()}"}
+
+
+class ConversationLease:
+    """A slot of the conversation budget, held until `release` is called."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def release(self):
+        """Give the slot back to the budget."""
+        self._conn.close()
+
+
+class ConversationBudget:
+    """A client of the conversation budget served by a `ConversationBudgetServer`."""
+
+    def __init__(self, address: tuple[str, int], authkey: bytes):
+        """Initialize the client.
+
+        Args:
+            address (tuple[str, int]): The address of the server.
+            authkey (bytes): The key authenticating the client.
+        """
+        self._address = address
+        self._authkey = authkey
+
+    def acquire(
+        self,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[ConversationLease]:
+        """Take a slot of the budget.
+
+        The request is sent once and waited for on its connection, which is closed if
+        the wait is given up.
+
+        Args:
+            timeout (Optional[float]): The number of seconds to wait for a free slot.
+                If `None`, waits until one is free.
+            cancel_event (Optional[threading.Event]): An event that ends the wait once set.
+
+        Returns:
+            Optional[ConversationLease]: The lease of the slot, or `None` if no slot
+                became free in time or the wait was cancelled.
+        """
+        conn = Client(self._address, authkey=self._authkey)
+        deadline = None if timeout is None else time.monotonic() + timeout + _REPLY_MARGIN
+        try:
+            conn.send(timeout)
+            while not (cancel_event and cancel_event.is_set()):
+                wait = _CANCEL_CHECK_INTERVAL if cancel_event else None
+                if deadline is not None:
+                    remaining = max(deadline - time.monotonic(), 0)
+                    wait = remaining if wait is None else min(wait, remaining)
+                if conn.poll(wait):
+                    if conn.recv():
+                        return ConversationLease(conn)
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+        except (EOFError, OSError):
+            pass
+        # a slot granted after this point is freed when the server sees the closed connection
+        conn.close()
+        return None
+
+
+def connect_conversation_budget(
+    value: Optional[str] = None,
+) -> Optional[ConversationBudget]:
+    """Connect to the conversation budget shared by a parent process, if any.
+
+    Args:
+        value (Optional[str]): The connection string. If `None`, it is read from the
+            `AGENTEVAL_CONVERSATION_BUDGET` environment variable.
+
+    Returns:
+        Optional[ConversationBudget]: A client taking leases from the budget, or `None`
+            if no budget is shared or it cannot be reached.
+    """
+    value = value or os.environ.get(BUDGET_ENV)
+    if not value:
+        return None
+
+    try:
+        host, port, authkey = value.rsplit(":", 2)
+        budget = ConversationBudget((host, int(port)), bytes.fromhex(authkey))
+        # check that the server can be reached
+        lease = budget.acquire(timeout=0)
+        if lease:
+            lease.release()
+        return budget
+    except (ValueError, OSError, AuthenticationError) as e:
+        logger.warning(f"Ignoring unreachable conversation budget: {e}")
+        return None
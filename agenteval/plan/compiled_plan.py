@@ -0,0 +1,128 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Optional
+
+import yaml
+
+from agenteval.test import Test, TestSuite
+
+# the libyaml loader is several times faster on plans with large `vars_glob` blocks
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# number of distinct plan contents kept in memory
+_MAX_COMPILED_PLANS = 32
+
+_cache: OrderedDict[str, CompiledPlan] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _parse_yaml(content: str) -> Any:
+    return yaml.load(content, Loader=_YAML_LOADER)
+
+
+class CompiledPlan:
+    """A plan file parsed, rendered and validated once.
+
+    Attributes:
+        digest (str): The SHA-256 hex digest of the file content.
+        source (dict): The YAML document before rendering, with its templates intact.
+        config (dict): The plan configuration, rendered with the `vars_glob` of the file.
+    """
+
+    def __init__(self, digest: str, content: str):
+        """
+        Parse and render the content of a plan file.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the content.
+            content (str): The content of the plan file.
+        """
+        self.digest = digest
+        self.source = _parse_yaml(content) or {}
+
+        contexto = {}
+        if isinstance(self.source, dict) and "vars_glob" in self.source:
+            contexto["vars_glob"] = self.source["vars_glob"]
+
+        from agenteval import jinja_env
+
+        renderizado = jinja_env.from_string(content).render(**contexto)
+        self.config = _parse_yaml(renderizado)
+
+        # tests validated so far, by name; each test is validated once, when first selected
+        self._tests = {}
+        self._tests_lock = threading.Lock()
+
+    @cached_property
+    def test_suite(self) -> TestSuite:
+        """The validated suite of every test in the plan."""
+        return TestSuite(tests=self._load_tests(list(self.config["tests"])))
+
+    def load_test_suite(self, filter: Optional[str] = None) -> TestSuite:
+        """Get the tests of the plan selected by a filter.
+
+        Args:
+            filter (Optional[str]): Specifies the test(s) to select, where multiple tests
+                should be seperated using a comma. If `None`, all tests are selected.
+
+        Returns:
+            TestSuite: The selected tests. Only these are validated.
+        """
+        if not filter:
+            return self.test_suite
+
+        return TestSuite(tests=self._load_tests(TestSuite._parse_filter(filter)))
+
+    def _load_tests(self, names: list[str]) -> list[Test]:
+        with self._tests_lock:
+            missing = [name for name in names if name not in self._tests]
+            if missing:
+                config = {name: self.config["tests"][name] for name in missing}
+                suite = TestSuite.load(config, None, self.config.get("test_defaults"))
+                self._tests.update((test.name, test) for test in suite)
+            return [self._tests[name] for name in names]
+
+
+def load_compiled_plan(path: str) -> CompiledPlan:
+    """Load a plan file, reusing the compiled plan of an identical content.
+
+    Plans are cached in memory by content digest, so every consumer of the same file
+    within a process shares a single parse and render. The returned configuration is
+    shared and must not be modified.
+
+    Args:
+        path (str): The path to the plan file.
+
+    Returns:
+        CompiledPlan: The compiled plan.
+    """
+    with open(path, "rb") as archivo:
+        contenido = archivo.read()
+    digest = hashlib.sha256(contenido).hexdigest()
+
+    with _cache_lock:
+        compiled = _cache.get(digest)
+        if compiled is not None:
+            _cache.move_to_end(digest)
+            return compiled
+
+    compiled = CompiledPlan(digest, contenido.decode("utf-8"))
+
+    with _cache_lock:
+        _cache[digest] = compiled
+        while len(_cache) > _MAX_COMPILED_PLANS:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def clear_compiled_plans():
+    """Remove every compiled plan from the cache."""
+    with _cache_lock:
+        _cache.clear()
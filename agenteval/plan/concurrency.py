@@ -0,0 +1,120 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+from typing import Optional
+
+# weight of the most recent latency sample in the moving average
+_LATENCY_SMOOTHING = 0.2
+
+
+class AIMDConcurrencyController:
+    """Limits the number of in-flight tests using additive-increase/multiplicative-decrease.
+
+    The controller is fed with the outcome of every AWS call made by the evaluator and
+    target clients (see `agenteval.utils.add_call_listener`):
+
+    - A throttled attempt shrinks the limit by `decrease_factor`, at most once per
+      `cooldown` seconds so a burst of throttles counts as a single congestion event.
+    - After `limit` consecutive successful calls, the limit grows by one, unless the
+      smoothed latency of the service has grown past `latency_tolerance` times the
+      lowest smoothed latency observed for it.
+
+    Attributes:
+        limit (int): The current number of tests allowed to run concurrently.
+        min_limit (int): The lower bound of the limit.
+        max_limit (int): The upper bound of the limit.
+        peak_limit (int): The highest limit reached during the run.
+        throttle_count (int): The number of throttled attempts observed.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        max_limit: int,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        cooldown: float = 5.0,
+    ):
+        """Initialize the controller.
+
+        Args:
+            initial_limit (int): The limit to start with.
+            max_limit (int): The upper bound of the limit.
+            min_limit (int): The lower bound of the limit.
+            decrease_factor (float): The factor applied to the limit on throttling.
+            latency_tolerance (float): The latency inflation above which the limit stops growing.
+            cooldown (float): The minimum number of seconds between two decreases.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = min(max(initial_limit, min_limit), self.max_limit)
+        self.peak_limit = self.limit
+        self.throttle_count = 0
+        self._decrease_factor = decrease_factor
+        self._latency_tolerance = latency_tolerance
+        self._cooldown = cooldown
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = None
+        self._smoothed_latency = {}
+        self._baseline_latency = {}
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Block until a test may start."""
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self):
+        """Signal that a test has finished."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_call(self, service_name: str, throttled: bool, latency: Optional[float]):
+        """Update the limit from the outcome of an AWS call.
+
+        Args:
+            service_name (str): The service that was called.
+            throttled (bool): Whether the attempt was throttled.
+            latency (Optional[float]): The latency of the call in seconds.
+        """
+        with self._condition:
+            if throttled:
+                self.throttle_count += 1
+                self._decrease()
+            elif latency is not None:
+                if self._update_latency(service_name, latency):
+                    self._successes += 1
+                    if self._successes >= self.limit:
+                        self._increase()
+
+    def _update_latency(self, service_name: str, latency: float) -> bool:
+        smoothed = self._smoothed_latency.get(service_name, latency)
+        smoothed += _LATENCY_SMOOTHING * (latency - smoothed)
+        self._smoothed_latency[service_name] = smoothed
+
+        baseline = min(self._baseline_latency.get(service_name, smoothed), smoothed)
+        self._baseline_latency[service_name] = baseline
+
+        return smoothed <= baseline * self._latency_tolerance
+
+    def _increase(self):
+        self._successes = 0
+        if self.limit < self.max_limit:
+            self.limit += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._condition.notify_all()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if self._last_decrease is not None and now - self._last_decrease < self._cooldown:
+            return
+        self._last_decrease = now
+        self._successes = 0
+        self.limit = max(self.min_limit, int(self.limit * self._decrease_factor))
@@ -0,0 +1,129 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+from agenteval.test import Test
+
+# weight of the most recent run in the recorded duration
+_DURATION_SMOOTHING = 0.5
+
+# assumed duration of a turn until one has been measured
+_DEFAULT_SECONDS_PER_TURN = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class DurationHistory:
+    """A local record of how long each test took in previous runs.
+
+    Durations are kept per target configuration and test name as an exponentially
+    weighted moving average, together with an average duration per conversation
+    turn used to estimate tests that have never been run.
+
+    Attributes:
+        path (str): The path to the history file.
+    """
+
+    def __init__(self, path: str, target_config: dict):
+        """
+        Initialize the history, loading the durations recorded so far.
+
+        Args:
+            path (str): The path to the history file.
+            target_config (dict): The `target` configuration of the plan.
+        """
+        self.path = path
+        self._target_key = hashlib.sha256(
+            json.dumps(target_config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self._updated = set()
+        self._durations, self._seconds_per_turn = self._load()
+
+    def _key(self, test: Test) -> str:
+        return f"{self._target_key}:{test.name}"
+
+    def _load(self) -> tuple[dict, Optional[float]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+            return dict(history.get("tests", {})), history.get("seconds_per_turn")
+        except FileNotFoundError:
+            pass
+        except (ValueError, AttributeError):
+            logger.warning(f"Ignoring unreadable duration history at {self.path}")
+        return {}, None
+
+    def estimate(self, test: Test) -> float:
+        """Estimate the duration of a test.
+
+        Tests without history are estimated from their maximum number of turns
+        and number of steps.
+
+        Args:
+            test (Test): The test case.
+
+        Returns:
+            float: The expected duration in seconds.
+        """
+        with self._lock:
+            duration = self._durations.get(self._key(test))
+            if duration is not None:
+                return duration
+            seconds_per_turn = self._seconds_per_turn or _DEFAULT_SECONDS_PER_TURN
+        return test.max_turns * len(test.steps) * seconds_per_turn
+
+    def record(self, test: Test, duration: float, turns: int):
+        """Record the duration of a finished test.
+
+        Args:
+            test (Test): The test case.
+            duration (float): The wall-clock duration of the test in seconds.
+            turns (int): The number of conversation turns the test took.
+        """
+        with self._lock:
+            key = self._key(test)
+            self._durations[key] = self._smooth(self._durations.get(key), duration)
+            self._updated.add(key)
+            if turns:
+                self._seconds_per_turn = self._smooth(
+                    self._seconds_per_turn, duration / turns
+                )
+
+    @staticmethod
+    def _smooth(previous: Optional[float], value: float) -> float:
+        if previous is None:
+            return value
+        return previous + _DURATION_SMOOTHING * (value - previous)
+
+    def save(self):
+        """Write the history to disk.
+
+        Only the durations recorded by this instance are written over the history
+        on disk, so plans running side by side do not discard each other's records.
+        Failing to write the history does not fail the run.
+        """
+        with self._lock:
+            if not self._updated:
+                return
+            durations, seconds_per_turn = self._load()
+            durations.update({key: self._durations[key] for key in self._updated})
+            history = {
+                "seconds_per_turn": self._seconds_per_turn or seconds_per_turn,
+                "tests": durations,
+            }
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(history, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Unable to save duration history to {self.path}: {e}")
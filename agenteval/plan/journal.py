@@ -0,0 +1,237 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import os
+import threading
+from typing import Iterable, Iterator, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from agenteval.test import TestResult
+
+_JOURNAL_FILE_NAME = "agenteval_results.jsonl"
+
+logger = logging.getLogger(__name__)
+
+
+class JournalEntry(BaseModel):
+    """A finished test recorded in the journal.
+
+    Attributes:
+        result: The result of the test.
+        input_token_count: Number of input tokens processed by the evaluator.
+        output_token_count: Number of output tokens generated by the evaluator.
+        estimated_output_token_count: The part of `output_token_count` that was estimated.
+        cache_read_token_count: Number of evaluator input tokens read from the prompt cache.
+        cache_write_token_count: Number of evaluator input tokens written to the prompt cache.
+        repetition: The repetition of the test, if the test is repeated.
+        duration: The wall-clock duration of the test in seconds.
+    """
+
+    result: TestResult
+    input_token_count: int = 0
+    output_token_count: int = 0
+    estimated_output_token_count: int = 0
+    cache_read_token_count: int = 0
+    cache_write_token_count: int = 0
+    repetition: Optional[int] = None
+    duration: Optional[float] = None
+
+
+class ResultRef(BaseModel):
+    """The outcome of a finished test and the location of its entry in the journal.
+
+    Only references are kept in memory during a run; the full result, including the
+    conversation, is read back from the journal when needed.
+
+    Attributes:
+        test_name: Name of the test.
+        passed: `True` if the test passed, otherwise `False`.
+        skipped: `True` if the test was not run to completion.
+        pending_evaluation: `True` if the conversation awaits its evaluation.
+        input_token_count: Number of input tokens processed by the evaluator.
+        output_token_count: Number of output tokens generated by the evaluator.
+        estimated_output_token_count: The part of `output_token_count` that was estimated.
+        cache_read_token_count: Number of evaluator input tokens read from the prompt cache.
+        cache_write_token_count: Number of evaluator input tokens written to the prompt cache.
+        repetition: The repetition of the test, if the test is repeated.
+        duration: The wall-clock duration of the test in seconds.
+        offset: The byte offset of the entry in the journal.
+    """
+
+    test_name: str
+    passed: bool
+    skipped: bool
+    pending_evaluation: bool
+    input_token_count: int
+    output_token_count: int
+    estimated_output_token_count: int
+    cache_read_token_count: int
+    cache_write_token_count: int
+    repetition: Optional[int]
+    duration: Optional[float]
+    offset: int
+
+    @classmethod
+    def from_entry(cls, entry: JournalEntry, offset: int) -> "ResultRef":
+        return cls(
+            test_name=entry.result.test_name,
+            passed=entry.result.passed,
+            skipped=entry.result.skipped,
+            pending_evaluation=entry.result.pending_evaluation,
+            input_token_count=entry.input_token_count,
+            output_token_count=entry.output_token_count,
+            estimated_output_token_count=entry.estimated_output_token_count,
+            cache_read_token_count=entry.cache_read_token_count,
+            cache_write_token_count=entry.cache_write_token_count,
+            repetition=entry.repetition,
+            duration=entry.duration,
+            offset=offset,
+        )
+
+
+class Journal:
+    """An append-only JSON Lines file recording each test as soon as it finishes.
+
+    The file is the live result stream of a run (`agenteval_results.jsonl`), which
+    other tools can follow while tests are running. It is also used to resume an
+    interrupted run and to render the summary without keeping results in memory.
+
+    Attributes:
+        path (str): The path to the journal file.
+    """
+
+    def __init__(self, work_dir: str):
+        """
+        Initialize the journal.
+
+        Args:
+            work_dir (str): The directory where the journal is stored.
+        """
+        self.path = os.path.join(work_dir, _JOURNAL_FILE_NAME)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Discard the entries of a previous run."""
+        with self._lock:
+            open(self.path, "w", encoding="utf-8").close()
+
+    def rewrite(self, entries: Iterable[JournalEntry]) -> list[ResultRef]:
+        """Atomically replace the journal with the given entries.
+
+        Used when resuming, so that an entry cut short by an interrupted run does
+        not corrupt the entries appended afterwards. The entries may be read lazily
+        from the journal itself.
+
+        Args:
+            entries (Iterable[JournalEntry]): The entries to keep.
+
+        Returns:
+            list[ResultRef]: References to the entries in the new journal.
+        """
+        tmp_path = f"{self.path}.tmp"
+        refs = []
+
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                for entry in entries:
+                    refs.append(ResultRef.from_entry(entry, f.tell()))
+                    f.write(self._encode(entry))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+        return refs
+
+    def append(self, entry: JournalEntry) -> ResultRef:
+        """Durably append an entry to the journal.
+
+        Args:
+            entry (JournalEntry): The finished test.
+
+        Returns:
+            ResultRef: A reference to the entry.
+        """
+        line = self._encode(entry)
+
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+        return ResultRef.from_entry(entry, offset)
+
+    @staticmethod
+    def _encode(entry: JournalEntry) -> bytes:
+        return (entry.model_dump_json() + "\n").encode("utf-8")
+
+    def read_results(self, refs: list[ResultRef]) -> "JournalResults":
+        """Get a lazy view of the results the references point to.
+
+        Args:
+            refs (list[ResultRef]): The references, in the order to read them.
+
+        Returns:
+            JournalResults
+        """
+        return JournalResults(self, refs)
+
+    def read(self, ref: ResultRef) -> JournalEntry:
+        """Read the entry a reference points to.
+
+        Args:
+            ref (ResultRef): The reference.
+
+        Returns:
+            JournalEntry
+        """
+        with open(self.path, "rb") as f:
+            f.seek(ref.offset)
+            return JournalEntry.model_validate_json(f.readline())
+
+    def load(self) -> Iterator[JournalEntry]:
+        """Iterate over the entries recorded so far.
+
+        A line that cannot be parsed (e.g. one cut short when the process was
+        killed) is skipped.
+
+        Returns:
+            Iterator[JournalEntry]
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield JournalEntry.model_validate_json(line)
+                except ValidationError:
+                    logger.warning(
+                        f"Skipping unreadable journal entry at {self.path}:{line_number}"
+                    )
+
+
+class JournalResults:
+    """A re-iterable view of test results stored in a journal.
+
+    Each iteration reads the results one at a time, so only the result being
+    processed is held in memory.
+    """
+
+    def __init__(self, journal: Journal, refs: list[ResultRef]):
+        self._journal = journal
+        self._refs = refs
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __iter__(self) -> Iterator[TestResult]:
+        with open(self._journal.path, "rb") as f:
+            for ref in self._refs:
+                f.seek(ref.offset)
+                yield JournalEntry.model_validate_json(f.readline()).result
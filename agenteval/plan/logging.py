@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -18,26 +19,60 @@ def log_run_end(
     num_tests: int,
     pass_count: int,
     fail_count: int,
+    skip_count: int,
     elapsed_time: float,
     evaluator_input_token_count: int,
     evaluator_output_token_count: int,
+    evaluator_cache_read_token_count: int = 0,
+    evaluator_cache_write_token_count: int = 0,
+    evaluator_estimated_output_token_count: int = 0,
+    settled_concurrency: Optional[int] = None,
+    peak_concurrency: Optional[int] = None,
+    throttle_count: Optional[int] = None,
 ):
-    if fail_count:
+    if skip_count:
+        logger.error(
+            f"[red]{pass_count} passed, {fail_count} failed, {skip_count} skipped."
+        )
+    elif fail_count:
         logger.error(f"[red]{pass_count} passed, {fail_count} failed.")
     else:
         logger.info(f"[green]{num_tests} passed.")
 
     logger.info(f"Completed in {elapsed_time} seconds.")
 
+    if settled_concurrency is not None:
+        logger.info(
+            f"Adaptive concurrency settled at {settled_concurrency} "
+            f"(peak {peak_concurrency}, {throttle_count} throttled calls)."
+        )
+
     if verbose:
         for _, result in results.items():
+            name = result.test_name
+            if result.repetition is not None:
+                name = f"{name} #{result.repetition}"
             if result.passed:
-                logger.info(f"[bold green]{result.test_name}...PASSED")
+                logger.info(f"[bold green]{name}...PASSED")
+            elif result.skipped:
+                logger.warning(f"[bold yellow]{name}...SKIPPED")
             else:
-                logger.error(f"[bold red]{result.test_name}...FAILED")
+                logger.error(f"[bold red]{name}...FAILED")
         logger.info(
             f"Input tokens processed by evaluator: {evaluator_input_token_count}"
         )
-        logger.info(
-            f"Output tokens generated by evaluator: {evaluator_output_token_count}"
-        )
+        if evaluator_estimated_output_token_count:
+            logger.info(
+                f"Output tokens generated by evaluator: ~{evaluator_output_token_count} "
+                f"(estimate: {evaluator_estimated_output_token_count} from responses "
+                f"read partially)"
+            )
+        else:
+            logger.info(
+                f"Output tokens generated by evaluator: {evaluator_output_token_count}"
+            )
+        if evaluator_cache_read_token_count or evaluator_cache_write_token_count:
+            logger.info(
+                f"Input tokens read from / written to the evaluator prompt cache: "
+                f"{evaluator_cache_read_token_count} / {evaluator_cache_write_token_count}"
+            )
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import concurrent.futures
+import contextlib
 import logging
 import os
 import sys
@@ -13,21 +14,48 @@ from pathlib import Path
 from typing import Optional
 
 import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from rich.progress import Progress
 
-from agenteval import defaults
+from agenteval import configure_logger, defaults
 from agenteval.evaluators import EvaluatorFactory
+from agenteval.plan.budget import ConversationLease, connect_conversation_budget
+from agenteval.plan.compiled_plan import CompiledPlan, load_compiled_plan
+from agenteval.plan.concurrency import AIMDConcurrencyController
+from agenteval.plan.duration_history import DurationHistory
 from agenteval.plan.exceptions import TestFailureError
+from agenteval.plan.journal import Journal, JournalEntry, ResultRef
 from agenteval.plan.logging import log_run_end, log_run_start
+from agenteval.plan.result_cache import ResultCache, fingerprint_test
+from agenteval.metrics import calculate_latency_spread, calculate_wilson_interval
 from agenteval.summary import create_markdown_summary
 from agenteval.targets import TargetFactory
-from agenteval.test import TestSuite
+from agenteval.test import Test, TestSuite
 from agenteval.test.test_result import TestResult
 from agenteval.conversation import Conversation
+from agenteval.trace import get_trace_file_name
+from agenteval.utils import (
+    add_call_listener,
+    configure_client_pool,
+    remove_call_listener,
+)
 
 _DEFAULT_PLAN_FILE_NAME = "agenteval.yml"
 
+_EXCEPTION_RESULT = "Failed due to exception"
+_SKIPPED_RESULT = "Test skipped: the run was stopped before it started."
+_SKIPPED_EVALUATION_RESULT = (
+    "Test skipped: the run was stopped before the conversation was evaluated."
+)
+
+_TOKEN_COUNT_NAMES = (
+    "input_token_count",
+    "output_token_count",
+    "estimated_output_token_count",
+    "cache_read_token_count",
+    "cache_write_token_count",
+)
+
 _DEFAULT__PLAN = {
     "evaluator": {"model": "claude-3", "eval_method": "canonical"},
     "target": {
@@ -59,6 +87,8 @@ class Plan(BaseModel):
 
     config: dict
 
+    _compiled: Optional[CompiledPlan] = PrivateAttr(default=None)
+
     @classmethod
     def load(
         cls,
@@ -75,24 +105,17 @@ class Plan(BaseModel):
             Plan: A `Plan` instance containing the loaded test plan configurations.
         """
         plan_path = os.path.join(plan_dir or os.getcwd(), plan_file_name)
-        plan = cls._load_yaml(plan_path)
-        return cls(config=plan)
-
-    @staticmethod
-    def _load_yaml(path: str) -> dict:
-        with open(path, "r", encoding="utf-8") as archivo:
-            contenido = archivo.read()
-
-        primer_parseo = yaml.safe_load(contenido) or {}
-        contexto = {}
-        if isinstance(primer_parseo, dict) and "vars_glob" in primer_parseo:
-            contexto["vars_glob"] = primer_parseo["vars_glob"]
-
-        from agenteval import jinja_env
-        renderizado = jinja_env.from_string(contenido).render(**contexto)
-
-        return yaml.safe_load(renderizado)
-
+        compiled = load_compiled_plan(plan_path)
+        plan = cls(config=compiled.config)
+        plan._compiled = compiled
+        return plan
+
+    def _load_test_suite(self, filter: Optional[str]) -> TestSuite:
+        if self._compiled:
+            return self._compiled.load_test_suite(filter)
+        return TestSuite.load(
+            self.config["tests"], filter, self.config.get("test_defaults")
+        )
 
     @staticmethod
     def init_plan(
@@ -137,6 +160,16 @@ class Plan(BaseModel):
         num_threads: Optional[int] = None,
         work_dir: Optional[str] = None,
         filter: Optional[str] = None,
+        adaptive: bool = False,
+        resume: bool = False,
+        reuse_passed: bool = False,
+        cache_dir: Optional[str] = None,
+        cache_ttl_hours: Optional[float] = None,
+        fail_fast: Optional[int] = None,
+        repeat: int = 1,
+        pipeline: bool = False,
+        num_eval_threads: Optional[int] = None,
+        reevaluate: bool = False,
     ):
         """Run the test plan.
 
@@ -148,106 +181,792 @@ class Plan(BaseModel):
                 generated. If `None`, the assets will be saved to the current working directory.
             filter (Optional[str]): Specifies the test(s) to run, where multiple tests should be seperated using a comma.
                 If `None`, all tests will be run.
+            adaptive (bool): Whether to adapt the number of concurrent tests to throttling and
+                latency (additive-increase/multiplicative-decrease), with `num_threads` as the
+                upper bound.
+            resume (bool): Whether to resume a previous run in `work_dir`, skipping the tests
+                recorded in its `agenteval_results.jsonl`. Tests that failed due to an exception are run again.
+            reuse_passed (bool): Whether to reuse the cached result of tests that passed in a
+                previous run and have not changed since, and to cache the tests passing in this run.
+            cache_dir (Optional[str]): The directory of the result cache. If `None`,
+                `~/.agenteval/results` is used.
+            cache_ttl_hours (Optional[float]): The number of hours a cached result can be reused.
+                If `None`, cached results are reused for 24 hours.
+            fail_fast (Optional[int]): The number of failed tests after which the run is stopped.
+                Queued tests are skipped and running tests end at their next turn. If `None`,
+                all tests are run.
+            repeat (int): The number of independent runs of each test. Each run has its own
+                target session and trace file, and the summary reports the pass rate,
+                confidence interval and latency spread of each test.
+            pipeline (bool): Whether to run the tests in two phases. Conversations are run
+                first and end once all steps have been attempted; their final evaluations
+                are then run in a separate pool, with the `final_evaluator` configuration
+                of the plan if provided.
+            num_eval_threads (Optional[int]): Number of threads used to run the final
+                evaluations concurrently. If `None`, the thread count will be set to the
+                number of evaluations (up to a maximum of `45` threads).
+            reevaluate (bool): Whether to resume a previous run in `work_dir` and evaluate
+                again the conversations it recorded with `pipeline`, without running them
+                against the target.
         """
-        self._setup_run(filter, work_dir, num_threads)
+        if repeat < 1:
+            raise ValueError("repeat must be at least 1")
+
+        configure_logger()
+        self._setup_run(
+            filter,
+            work_dir,
+            num_threads,
+            adaptive,
+            resume,
+            reuse_passed,
+            cache_dir,
+            cache_ttl_hours,
+            fail_fast,
+            repeat,
+            pipeline,
+            reevaluate,
+        )
 
-        log_run_start(verbose, self._num_tests, self._num_threads)
+        if resume or reevaluate:
+            logger.info(
+                f"Resuming run: {self._num_runs - len(self._pending_runs)} test(s) already completed"
+            )
+        log_run_start(verbose, len(self._pending_runs), self._num_threads)
 
         start = time.time()
 
-        with Progress(transient=True) as self._progress:
-            self._tracker = self._progress.add_task("running...", total=self._num_tests)
-            self._run_concurrent()
+        if self._controller:
+            add_call_listener(self._controller.on_call)
 
-        fail_count = self._num_tests - self._pass_count
+        try:
+            with Progress(transient=True) as self._progress:
+                self._tracker = self._progress.add_task(
+                    "running...", total=len(self._pending_runs)
+                )
+                self._run_concurrent()
+                self._skip_unfinished_tests()
+                self._run_evaluations(verbose, num_eval_threads)
+        finally:
+            if self._controller:
+                remove_call_listener(self._controller.on_call)
+            self._duration_history.save()
+
+        if not self._finish_run(verbose, round(time.time() - start, 2)):
+            raise TestFailureError
+
+    def prepare(
+        self,
+        work_dir: Optional[str] = None,
+        filter: Optional[str] = None,
+        resume: bool = False,
+        reuse_passed: bool = False,
+        cache_dir: Optional[str] = None,
+        cache_ttl_hours: Optional[float] = None,
+        fail_fast: Optional[int] = None,
+        repeat: int = 1,
+    ) -> list[tuple[Test, Optional[int]]]:
+        """Prepare a run of the test plan whose tests are scheduled by the caller.
+
+        Each returned run is passed to `run_one`, then `finish_tests` and `finish`
+        complete the run. The arguments have the same meaning as in `run`.
+
+        Returns:
+            list[tuple[Test, Optional[int]]]: The test and repetition of each run left
+                to do, longest expected first.
+        """
+        if repeat < 1:
+            raise ValueError("repeat must be at least 1")
+
+        self._setup_run(
+            filter,
+            work_dir,
+            None,
+            False,
+            resume,
+            reuse_passed,
+            cache_dir,
+            cache_ttl_hours,
+            fail_fast,
+            repeat,
+        )
+        return list(self._pending_runs)
+
+    @property
+    def work_dir(self) -> str:
+        """The directory of the prepared run."""
+        return self._work_dir
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the prepared run was stopped by `fail_fast` or `stop`."""
+        return self._cancel_event.is_set()
+
+    def stop(self, reason: str):
+        """Stop the prepared run as `fail_fast` does: the runs not started yet are
+        skipped and the running tests end at their next turn.
+
+        Args:
+            reason (str): Why the run was stopped, recorded in the skipped results.
+        """
+        with self._lock:
+            if not self._cancel_event.is_set():
+                self._stop_reason = reason
+                self._cancel_event.set()
+
+    def expected_duration(self, test: Test) -> float:
+        """Estimate the duration of a test from its previous runs.
+
+        Args:
+            test (Test): The test.
+
+        Returns:
+            float: The expected duration in seconds.
+        """
+        return self._duration_history.estimate(test)
+
+    @contextlib.contextmanager
+    def running(self, progress: Optional[Progress] = None, task_id=None):
+        """Report the finished runs to a progress bar while in the context, and save
+        the durations of the tests on exit.
+
+        Args:
+            progress (Optional[Progress]): The progress bar.
+            task_id: The task of the progress bar advanced by each finished run.
+        """
+        self._progress = progress
+        self._tracker = task_id
+        try:
+            yield
+        finally:
+            self._progress = None
+            self._duration_history.save()
+
+    def run_one(self, test: Test, repetition: Optional[int]):
+        """Run a test of the prepared run and record its result.
+
+        Args:
+            test (Test): The test.
+            repetition (Optional[int]): The repetition of the test.
+        """
+        self._run_test(test, repetition)
+
+    def finish_tests(self, verbose: bool, num_eval_threads: Optional[int] = None):
+        """Record the runs that were not started as skipped, and evaluate the
+        conversations left pending evaluation.
+
+        Args:
+            verbose (bool): Whether to enable verbose logging.
+            num_eval_threads (Optional[int]): Number of threads used to run the final
+                evaluations concurrently.
+        """
+        self._skip_unfinished_tests()
+        self._run_evaluations(verbose, num_eval_threads)
+
+    def finish(self, verbose: bool, elapsed_time: float) -> bool:
+        """Log the outcome of the prepared run and write its summary.
+
+        Args:
+            verbose (bool): Whether to enable verbose logging.
+            elapsed_time (float): The number of seconds the run took.
+
+        Returns:
+            bool: `True` if every test passed, otherwise `False`.
+        """
+        return self._finish_run(verbose, elapsed_time)
+
+    def results(self) -> list[TestResult]:
+        """Read the result of every test of the prepared run back from its journal.
+
+        Returns:
+            list[TestResult]: The results, in the order of the plan.
+        """
+        return list(self._journal.read_results(list(self._results.values())))
+
+    def _finish_run(self, verbose: bool, elapsed_time: float) -> bool:
+        skip_count = sum(
+            1 for result in self._results.values() if result is not None and result.skipped
+        )
+        fail_count = self._num_runs - self._pass_count - skip_count
 
         log_run_end(
             verbose,
             self._results,
-            self._num_tests,
+            self._num_runs,
             self._pass_count,
             fail_count,
-            round(time.time() - start, 2),
-            sum(self._evaluator_input_token_counts),
-            sum(self._evaluator_output_token_counts),
+            skip_count,
+            elapsed_time,
+            self._evaluator_input_token_count,
+            self._evaluator_output_token_count,
+            self._evaluator_cache_read_token_count,
+            self._evaluator_cache_write_token_count,
+            self._evaluator_estimated_output_token_count,
+            **self._concurrency_report(),
         )
 
         create_markdown_summary(
             self._work_dir,
             self._pass_count,
-            self._num_tests,
+            self._num_runs,
             self._test_suite.tests,
-            list(self._results.values()),
+            self._journal.read_results(self._representative_results()),
+            self._repetition_stats(),
         )
 
-        if fail_count:
-            raise TestFailureError
+        return not fail_count and not skip_count
 
     def _setup_run(
-        self, filter: Optional[str], work_dir: Optional[str], num_threads: Optional[int]
+        self,
+        filter: Optional[str],
+        work_dir: Optional[str],
+        num_threads: Optional[int],
+        adaptive: bool,
+        resume: bool,
+        reuse_passed: bool,
+        cache_dir: Optional[str],
+        cache_ttl_hours: Optional[float],
+        fail_fast: Optional[int],
+        repeat: int,
+        pipeline: bool = False,
+        reevaluate: bool = False,
     ):
         self._evaluator_factory = EvaluatorFactory(config=self.config["evaluator"])
+        self._final_evaluator_factory = EvaluatorFactory(
+            config=self._final_evaluator_config()
+        )
+        if pipeline and not self._evaluator_factory.supports_deferred_evaluation:
+            raise ValueError(
+                "The evaluator does not support running the conversations and evaluations in separate phases"
+            )
+        if (
+            pipeline or reevaluate
+        ) and not self._final_evaluator_factory.supports_deferred_evaluation:
+            raise ValueError(
+                "The final evaluator does not support evaluating recorded conversations"
+            )
         self._target_factory = TargetFactory(config=self.config["target"])
-        self._test_suite = TestSuite.load(self.config["tests"], filter)
+        self._test_suite = self._load_test_suite(filter)
         self._lock = threading.Lock()
-        self._num_tests = self._test_suite.num_tests
         self._work_dir = work_dir or os.getcwd()
-        self._num_threads = self._resolve_num_threads(self._num_tests, num_threads)
-        self._results = {test.name: None for test in self._test_suite}
-        self._evaluator_input_token_counts = []
-        self._evaluator_output_token_counts = []
+        # results are keyed by test name and repetition, which is `None` unless repeating
+        self._repeat = repeat
+        self._repetitions = [None] if repeat == 1 else list(range(1, repeat + 1))
+        self._results = {
+            (test.name, repetition): None
+            for test in self._test_suite
+            for repetition in self._repetitions
+        }
+        self._num_runs = len(self._results)
+        self._evaluator_input_token_count = 0
+        self._evaluator_output_token_count = 0
+        self._evaluator_estimated_output_token_count = 0
+        self._evaluator_cache_read_token_count = 0
+        self._evaluator_cache_write_token_count = 0
         self._pass_count = 0
+        self._journal = Journal(self._work_dir)
+        self._fail_fast = fail_fast
+        self._failures_this_run = 0
+        self._cancel_event = threading.Event()
+        self._stop_reason = "The run was stopped."
+        self._progress = None
+        self._pipeline = pipeline
+        self._reevaluate = reevaluate
+        # the latest entry recording the conversation of each test pending evaluation
+        self._conversation_refs = {}
+
+        if resume or reevaluate:
+            completed = (
+                entry
+                for entry in self._journal.load()
+                if (entry.result.test_name, entry.repetition) in self._results
+                and entry.result.result != _EXCEPTION_RESULT
+                and not entry.result.skipped
+            )
+            for ref in self._journal.rewrite(completed):
+                self._add_result(ref)
+        else:
+            self._journal.reset()
+
+        if reuse_passed and repeat > 1:
+            logger.warning("Cached results are not reused when repeating tests")
+            reuse_passed = False
+        self._result_cache = (
+            self._get_result_cache(cache_dir, cache_ttl_hours) if reuse_passed else None
+        )
+        self._fingerprints = {}
+        if self._result_cache:
+            self._reuse_cached_results()
+
+        # start the longest tests first so they do not stretch the end of the run
+        self._duration_history = DurationHistory(
+            defaults.DURATION_HISTORY_PATH, self.config["target"]
+        )
+        self._pending_runs = sorted(
+            (
+                (test, repetition)
+                for test in self._test_suite
+                for repetition in self._repetitions
+                if self._results[(test.name, repetition)] is None
+            ),
+            key=lambda run: self._duration_history.estimate(run[0]),
+            reverse=True,
+        )
+        self._num_threads = self._resolve_num_threads(
+            max(len(self._pending_runs), 1), num_threads
+        )
+        configure_client_pool(max_pool_connections=self._num_threads)
+        self._controller = (
+            AIMDConcurrencyController(
+                initial_limit=min(
+                    self._num_threads, defaults.ADAPTIVE_INITIAL_NUM_THREADS
+                ),
+                max_limit=self._num_threads,
+            )
+            if adaptive
+            else None
+        )
+        # a limit on concurrent conversations shared with other runs, see `budget.py`
+        self._budget = connect_conversation_budget()
+
+    def _final_evaluator_config(self) -> dict:
+        # `final_evaluator` overrides the evaluator configuration of the final evaluations
+        overrides = self.config.get("final_evaluator") or {}
+        config = dict(self.config["evaluator"])
+        if "model" in overrides or "custom_config" in overrides:
+            config.pop("model", None)
+            config.pop("custom_config", None)
+        config.update(overrides)
+        return config
+
+    @staticmethod
+    def _get_result_cache(
+        cache_dir: Optional[str], cache_ttl_hours: Optional[float]
+    ) -> ResultCache:
+        ttl_hours = (
+            defaults.RESULT_CACHE_TTL_HOURS
+            if cache_ttl_hours is None
+            else cache_ttl_hours
+        )
+        return ResultCache(
+            cache_dir=cache_dir or defaults.RESULT_CACHE_DIR, ttl=ttl_hours * 3600
+        )
+
+    def _fingerprint(self, test) -> str:
+        return fingerprint_test(
+            test,
+            self.config["target"],
+            self.config["evaluator"],
+            self._final_evaluator_config(),
+        )
+
+    def _reuse_cached_results(self):
+        reused = 0
+        for test in self._test_suite:
+            # a resumed test pending evaluation is cached once evaluated
+            fingerprint = self._fingerprint(test)
+            self._fingerprints[test.name] = fingerprint
+            if self._results[(test.name, None)] is not None:
+                continue
+
+            cached = self._result_cache.get(fingerprint)
+            if cached and cached.passed:
+                self._add_result(self._journal.append(JournalEntry(result=cached)))
+                reused += 1
+
+        if reused:
+            logger.info(f"Reusing {reused} cached passing result(s)")
+
+    def invalidate_cached_results(
+        self, filter: Optional[str] = None, cache_dir: Optional[str] = None
+    ) -> int:
+        """Remove the cached results of the plan's tests.
+
+        Args:
+            filter (Optional[str]): Specifies the test(s) to invalidate, where multiple tests
+                should be seperated using a comma. If `None`, all tests of the plan are invalidated.
+            cache_dir (Optional[str]): The directory of the result cache. If `None`,
+                `~/.agenteval/results` is used.
+
+        Returns:
+            int: The number of cached results removed.
+        """
+        cache = self._get_result_cache(cache_dir, None)
+        return sum(
+            cache.invalidate(self._fingerprint(test))
+            for test in self._load_test_suite(filter)
+        )
+
+    @staticmethod
+    def clear_cached_results(cache_dir: Optional[str] = None) -> int:
+        """Remove every cached result, regardless of the plan it belongs to.
+
+        Args:
+            cache_dir (Optional[str]): The directory of the result cache. If `None`,
+                `~/.agenteval/results` is used.
+
+        Returns:
+            int: The number of cached results removed.
+        """
+        return Plan._get_result_cache(cache_dir, None).clear()
+
+    def _concurrency_report(self) -> dict:
+        if not self._controller:
+            return {}
+        return {
+            "settled_concurrency": self._controller.limit,
+            "peak_concurrency": self._controller.peak_limit,
+            "throttle_count": self._controller.throttle_count,
+        }
+
+    def _representative_results(self) -> list[ResultRef]:
+        # the first failing run of each test, or its first run if none failed
+        representatives = {}
+        for (test_name, _), ref in self._results.items():
+            current = representatives.get(test_name)
+            if current is None or (
+                (current.passed or current.skipped)
+                and not ref.passed
+                and not ref.skipped
+            ):
+                representatives[test_name] = ref
+        return list(representatives.values())
+
+    def _repetition_stats(self) -> Optional[list[dict]]:
+        if self._repeat == 1:
+            return None
+
+        stats = []
+        for test in self._test_suite:
+            refs = [
+                self._results[(test.name, repetition)]
+                for repetition in self._repetitions
+            ]
+            completed = [ref for ref in refs if not ref.skipped]
+            pass_count = sum(1 for ref in completed if ref.passed)
+            ci_low, ci_high = calculate_wilson_interval(pass_count, len(completed))
+            latency_min, latency_p50, latency_max = calculate_latency_spread(
+                [ref.duration for ref in completed if ref.duration is not None]
+            )
+            stats.append(
+                {
+                    "test_name": test.name,
+                    "num_runs": len(completed),
+                    "pass_count": pass_count,
+                    "skip_count": len(refs) - len(completed),
+                    "pass_rate": (
+                        round(pass_count / len(completed) * 100, 2) if completed else 0.0
+                    ),
+                    "ci_low": ci_low,
+                    "ci_high": ci_high,
+                    "latency_min": latency_min,
+                    "latency_p50": latency_p50,
+                    "latency_max": latency_max,
+                    "flaky": 0 < pass_count < len(completed),
+                }
+            )
+        return stats
 
     def _run_concurrent(self):
         with concurrent.futures.ThreadPoolExecutor(
             max_workers=self._num_threads
         ) as executor:
             futures = [
-                executor.submit(self._run_test, test) for test in self._test_suite
+                executor.submit(self._run_test, test, repetition)
+                for test, repetition in self._pending_runs
             ]
             for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
                 future.result()
+                if self._cancel_event.is_set():
+                    # queued tests are recorded as skipped once the executor drains
+                    for pending in futures:
+                        pending.cancel()
+
+    def _run_test(self, test: Test, repetition: Optional[int]):
+        if self._cancel_event.is_set():
+            return
+        if self._controller:
+            self._controller.acquire()
+        try:
+            lease = None
+            if self._budget:
+                try:
+                    lease = self._acquire_budget()
+                except TimeoutError as e:
+                    self._record_budget_timeout(test, repetition, e)
+                    return
+                if lease is None:
+                    return
+            try:
+                if self._cancel_event.is_set():
+                    return
+                start = time.monotonic()
+                result, token_counts = self._evaluate_test(test, repetition)
+            finally:
+                if lease:
+                    lease.release()
+        finally:
+            if self._controller:
+                self._controller.release()
+
+        duration = time.monotonic() - start
+        self._record_duration(test, result, duration)
+        self._record_result(test, repetition, result, token_counts, duration)
+
+    def _acquire_budget(self) -> Optional[ConversationLease]:
+        # a stopped run gives up its pending request for a slot
+        lease = self._budget.acquire(
+            timeout=defaults.CONVERSATION_BUDGET_TIMEOUT_SECONDS,
+            cancel_event=self._cancel_event,
+        )
+        if lease or self._cancel_event.is_set():
+            return lease
+        raise TimeoutError(
+            "No slot of the shared conversation budget became free within "
+            f"{defaults.CONVERSATION_BUDGET_TIMEOUT_SECONDS}s"
+        )
+
+    def _record_budget_timeout(
+        self, test: Test, repetition: Optional[int], e: TimeoutError
+    ):
+        # recorded as failed due to an exception, so a resumed run runs the test again
+        self._record_result(
+            test, repetition, self._handle_test_exception(test, repetition, e), {}
+        )
 
-    def _run_test(self, test):
+    def _evaluate_test(
+        self, test: Test, repetition: Optional[int]
+    ) -> tuple[TestResult, dict]:
         try:
-            target = self._target_factory.create()
+            target = self._target_factory.create(
+                test_name=test.name, repetition=repetition, work_dir=self._work_dir
+            )
             evaluator = self._evaluator_factory.create(
                 test=test,
                 target=target,
                 work_dir=self._work_dir,
+                cancel_event=self._cancel_event,
+                repetition=repetition,
+                defer_evaluation=self._pipeline,
             )
 
             result = evaluator.run()
-            input_tokens = evaluator.input_token_count
-            output_tokens = evaluator.output_token_count
+            return result, self._token_counts(evaluator)
+        except Exception as e:
+            return self._handle_test_exception(test, repetition, e), {}
+
+    @staticmethod
+    def _token_counts(evaluator) -> dict:
+        return {name: getattr(evaluator, name) for name in _TOKEN_COUNT_NAMES}
+
+    def _evaluation_runs(self) -> list:
+        tests = {test.name: test for test in self._test_suite}
+        return [
+            (tests[test_name], repetition, ref)
+            for (test_name, repetition), ref in self._conversation_refs.items()
+            if self._reevaluate
+            or self._results[(test_name, repetition)].pending_evaluation
+        ]
+
+    def _run_evaluations(self, verbose: bool, num_eval_threads: Optional[int]):
+        runs = self._evaluation_runs()
+        if runs:
+            num_threads = self._resolve_num_threads(len(runs), num_eval_threads)
+            configure_client_pool(
+                max_pool_connections=max(num_threads, self._num_threads)
+            )
+            logger.info(f"Evaluating {len(runs)} conversation(s)")
+            if verbose:
+                logger.info(f"Number of evaluation threads: {num_threads}")
+            if self._progress:
+                self._tracker = self._progress.add_task("evaluating...", total=len(runs))
+
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=num_threads
+            ) as executor:
+                futures = [
+                    executor.submit(self._run_evaluation, test, repetition, ref)
+                    for test, repetition, ref in runs
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    future.result()
+                    if self._cancel_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+
+        self._skip_unfinished_evaluations()
+
+    def _run_evaluation(self, test: Test, repetition: Optional[int], ref: ResultRef):
+        if self._cancel_event.is_set():
+            return
+        pending = self._journal.read(ref)
+        token_counts = {name: getattr(pending, name) for name in _TOKEN_COUNT_NAMES}
+
+        start = time.monotonic()
+        try:
+            evaluator = self._final_evaluator_factory.create(
+                test=test,
+                target=None,
+                work_dir=self._work_dir,
+                cancel_event=self._cancel_event,
+                repetition=repetition,
+            )
+            result = evaluator.run_evaluation(pending.result)
+            for name, count in self._token_counts(evaluator).items():
+                token_counts[name] += count
         except Exception as e:
-            logger.error(f"Test '{test.name}' failed with exception: {e}")
+            # the conversation is kept, so a resumed run evaluates it again
+            logger.error(f"Evaluation of test '{test.name}' failed with exception: {e}")
             result = TestResult(
                 test_name=test.name,
-                result="Failed due to exception",
+                result=_EXCEPTION_RESULT,
                 reasoning=str(e),
                 passed=False,
-                conversation=Conversation()
+                conversation=pending.result.conversation,
+                conversation_id=pending.result.conversation_id,
             )
-            input_tokens = 0
-            output_tokens = 0
-            # Save a trace file with the error
-            import json
-            trace_data = {
-                "test_name": test.name,
-                "error": str(e),
-                "conversation": [],
-                "steps": []
-            }
-            trace_file = Path(self._work_dir) / "agenteval_traces" / f"{test.name}.json"
-            trace_file.parent.mkdir(exist_ok=True)
-            with open(trace_file, "w", encoding="utf-8") as f:
-                json.dump(trace_data, f, indent=2)
+
+        duration = (pending.duration or 0) + time.monotonic() - start
+        self._record_result(test, repetition, result, token_counts, duration)
+
+    def _record_duration(self, test, result: TestResult, duration: float):
+        # a test cut short says little about how long it takes
+        if result.skipped or result.result == _EXCEPTION_RESULT:
+            return
+        self._duration_history.record(test, duration, result.conversation.turns)
+
+    def _handle_test_exception(
+        self, test: Test, repetition: Optional[int], e: Exception
+    ) -> TestResult:
+        logger.error(f"Test '{test.name}' failed with exception: {e}")
+        result = TestResult(
+            test_name=test.name,
+            result=_EXCEPTION_RESULT,
+            reasoning=str(e),
+            passed=False,
+            conversation=Conversation()
+        )
+        # Save a trace file with the error
+        import json
+        trace_data = {
+            "test_name": test.name,
+            "error": str(e),
+            "conversation": [],
+            "steps": []
+        }
+        trace_file = (
+            Path(self._work_dir)
+            / "agenteval_traces"
+            / get_trace_file_name(test.name, repetition)
+        )
+        trace_file.parent.mkdir(exist_ok=True)
+        with open(trace_file, "w", encoding="utf-8") as f:
+            json.dump(trace_data, f, indent=2)
+
+        return result
+
+    def _record_result(
+        self,
+        test: Test,
+        repetition: Optional[int],
+        result: TestResult,
+        token_counts: dict,
+        duration: Optional[float] = None,
+    ):
+        entry = JournalEntry(
+            result=result,
+            **token_counts,
+            repetition=repetition,
+            duration=duration,
+        )
+        ref = self._journal.append(entry)
+
+        if self._result_cache and result.passed is True:
+            self._result_cache.put(self._fingerprints[test.name], result)
 
         with self._lock:
-            if result.passed is True:
-                self._pass_count += 1
-            self._results[test.name] = result
-            self._evaluator_input_token_counts.append(input_tokens)
-            self._evaluator_output_token_counts.append(output_tokens)
-            self._progress.update(self._tracker, advance=1)
+            self._add_result(ref)
+            if self._progress:
+                self._progress.update(self._tracker, advance=1)
+
+            if not (result.passed or result.skipped or result.pending_evaluation):
+                self._failures_this_run += 1
+                if (
+                    self._fail_fast
+                    and self._failures_this_run >= self._fail_fast
+                    and not self._cancel_event.is_set()
+                ):
+                    logger.warning(
+                        f"Stopping run after {self._failures_this_run} failed test(s)"
+                    )
+                    self._stop_reason = (
+                        f"The run was stopped after {self._failures_this_run} failed test(s)."
+                    )
+                    self._cancel_event.set()
+
+    def _skip_unfinished_tests(self):
+        for test, repetition in self._pending_runs:
+            if self._results[(test.name, repetition)] is None:
+                self._record_result(
+                    test,
+                    repetition,
+                    TestResult(
+                        test_name=test.name,
+                        result=_SKIPPED_RESULT,
+                        reasoning=self._stop_reason,
+                        passed=False,
+                        skipped=True,
+                        conversation=Conversation(),
+                    ),
+                    {},
+                )
+
+    def _skip_unfinished_evaluations(self):
+        for test in self._test_suite:
+            for repetition in self._repetitions:
+                ref = self._results[(test.name, repetition)]
+                if ref is None or not ref.pending_evaluation:
+                    continue
+                pending = self._journal.read(ref)
+                self._record_result(
+                    test,
+                    repetition,
+                    TestResult(
+                        test_name=test.name,
+                        result=_SKIPPED_EVALUATION_RESULT,
+                        reasoning=self._stop_reason,
+                        passed=False,
+                        skipped=True,
+                        conversation=pending.result.conversation,
+                        conversation_id=pending.result.conversation_id,
+                    ),
+                    {name: getattr(pending, name) for name in _TOKEN_COUNT_NAMES},
+                    pending.duration,
+                )
+
+    def _add_result(self, ref: ResultRef):
+        # results are read back from the journal, only their outcome is kept in memory
+        key = (ref.test_name, ref.repetition)
+        previous = self._results.get(key)
+        if previous is not None:
+            # an evaluated result replaces the one pending evaluation, whose tokens it includes
+            self._count_result(previous, -1)
+        self._count_result(ref, 1)
+        self._results[key] = ref
+        if ref.pending_evaluation:
+            self._conversation_refs[key] = ref
+
+    def _count_result(self, ref: ResultRef, sign: int):
+        if ref.passed is True:
+            self._pass_count += sign
+        self._evaluator_input_token_count += sign * ref.input_token_count
+        self._evaluator_output_token_count += sign * ref.output_token_count
+        self._evaluator_estimated_output_token_count += (
+            sign * ref.estimated_output_token_count
+        )
+        self._evaluator_cache_read_token_count += sign * ref.cache_read_token_count
+        self._evaluator_cache_write_token_count += sign * ref.cache_write_token_count
@@ -0,0 +1,167 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from pydantic import ValidationError
+
+from agenteval.test import Test, TestResult
+
+_ENTRY_SUFFIX = ".json"
+
+# test settings that bound a run without changing the conversation being evaluated
+_RUN_LIMIT_FIELDS = {"timeout_seconds", "turn_timeout_seconds"}
+
+# evaluator settings that change how model calls are made, not what the model is asked
+_RUNTIME_EVALUATOR_KEYS = {
+    "streaming",
+    "response_cache",
+    "response_cache_dir",
+    "response_cache_max_size_mb",
+    "prompt_caching",
+}
+
+
+def fingerprint_test(
+    test: Test,
+    target_config: dict,
+    evaluator_config: dict,
+    final_evaluator_config: Optional[dict] = None,
+) -> str:
+    """Compute a content fingerprint of a test.
+
+    The fingerprint covers the rendered test (steps, expected results, initial prompt,
+    max turns, hook and session attributes) together with the target and evaluator
+    configurations, so any change to them yields a different fingerprint. Timeouts
+    and the evaluator settings that only change how the model is called (streaming,
+    response and prompt caching) do not change what a passing test observed, so they
+    are left out.
+
+    Args:
+        test (Test): The test case, rendered from the plan.
+        target_config (dict): The `target` configuration of the plan.
+        evaluator_config (dict): The `evaluator` configuration of the plan.
+        final_evaluator_config (Optional[dict]): The configuration of the evaluator of
+            the final evaluation, if it differs from `evaluator_config`.
+
+    Returns:
+        str: A hex digest identifying the test.
+    """
+    content = json.dumps(
+        {
+            "test": test.model_dump(mode="json", exclude=_RUN_LIMIT_FIELDS),
+            "target": target_config,
+            "evaluator": _without_runtime_keys(evaluator_config),
+            "final_evaluator": _without_runtime_keys(
+                final_evaluator_config or evaluator_config
+            ),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _without_runtime_keys(evaluator_config: dict) -> dict:
+    return {
+        k: v for k, v in evaluator_config.items() if k not in _RUNTIME_EVALUATOR_KEYS
+    }
+
+
+class ResultCache:
+    """A local store of passing test results keyed by test fingerprint.
+
+    Attributes:
+        cache_dir (str): The directory holding one JSON file per fingerprint.
+        ttl (float): The number of seconds a cached result remains valid.
+    """
+
+    def __init__(self, cache_dir: str, ttl: float):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): The directory where results are stored.
+            ttl (float): The number of seconds a cached result remains valid.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{fingerprint}{_ENTRY_SUFFIX}")
+
+    def get(self, fingerprint: str) -> Optional[TestResult]:
+        """Get the cached result for a fingerprint.
+
+        Expired or unreadable entries are removed.
+
+        Args:
+            fingerprint (str): The test fingerprint.
+
+        Returns:
+            Optional[TestResult]: The cached result, or `None` if there is no valid entry.
+        """
+        path = self._path(fingerprint)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["created_at"] > self.ttl:
+                raise ValueError("expired")
+            return TestResult.model_validate(entry["result"])
+        except FileNotFoundError:
+            return None
+        except (KeyError, ValueError, ValidationError):
+            self.invalidate(fingerprint)
+            return None
+
+    def put(self, fingerprint: str, result: TestResult):
+        """Store a result for a fingerprint.
+
+        Args:
+            fingerprint (str): The test fingerprint.
+            result (TestResult): The result to store.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        path = self._path(fingerprint)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"created_at": time.time(), "result": result.model_dump(mode="json")}, f
+            )
+        os.replace(tmp_path, path)
+
+    def invalidate(self, fingerprint: str) -> bool:
+        """Remove the entry for a fingerprint.
+
+        Args:
+            fingerprint (str): The test fingerprint.
+
+        Returns:
+            bool: `True` if an entry was removed.
+        """
+        try:
+            os.remove(self._path(fingerprint))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self) -> int:
+        """Remove every entry from the cache.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(_ENTRY_SUFFIX):
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
@@ -0,0 +1,221 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+from rich.progress import Progress
+
+from agenteval import configure_logger, defaults
+from agenteval.plan.logging import log_run_start
+from agenteval.plan.plan import Plan
+from agenteval.test import TestResult
+from agenteval.utils import configure_client_pool
+
+logger = logging.getLogger(__name__)
+
+
+class PlanRun(BaseModel):
+    """The outcome of a plan run by `PlanRunner`.
+
+    Attributes:
+        work_dir: The directory where the test results and traces were generated.
+        results: The result of every test, in the order of the plan.
+        passed: `True` if every test passed, otherwise `False`.
+        start_time: When the first test of the plan started.
+        end_time: When the last test of the plan ended.
+        elapsed_time: The number of seconds between the start and the end of the plan.
+    """
+
+    work_dir: str
+    results: list[TestResult]
+    passed: bool
+    start_time: datetime
+    end_time: datetime
+    elapsed_time: float
+
+
+class PlanRunner:
+    """Runs several test plans in the current process through one shared thread pool.
+
+    Compared to running each plan in its own `agenteval run` process, the modules,
+    AWS credentials and `boto3` clients are only set up once, the tests of all plans
+    are scheduled together (longest expected first) and results are returned as
+    `TestResult` objects instead of having to be recovered from the trace files.
+
+    Each plan still writes its own results journal, traces and summary to its work
+    directory.
+    """
+
+    def __init__(
+        self,
+        num_threads: Optional[int] = None,
+        verbose: bool = False,
+        show_progress: bool = True,
+        stop_all: bool = False,
+    ):
+        """Initialize the runner.
+
+        Args:
+            num_threads (Optional[int]): Number of threads shared by all plans. If `None`,
+                the thread count will be set to the total number of tests (up to a maximum
+                of `45` threads).
+            verbose (bool): Whether to enable verbose logging.
+            show_progress (bool): Whether to display a progress bar.
+            stop_all (bool): Whether a plan stopped by `fail_fast` stops the other plans
+                too. If `False`, the other plans keep running.
+        """
+        self.num_threads = num_threads
+        self.verbose = verbose
+        self.show_progress = show_progress
+        self.stop_all = stop_all
+        self._queue = []
+
+    def add(
+        self,
+        plan: Plan,
+        work_dir: str,
+        filter: Optional[str] = None,
+        resume: bool = False,
+        reuse_passed: bool = False,
+        cache_dir: Optional[str] = None,
+        cache_ttl_hours: Optional[float] = None,
+        fail_fast: Optional[int] = None,
+        repeat: int = 1,
+    ):
+        """Queue a plan to be run.
+
+        The arguments have the same meaning as in `Plan.run`.
+
+        Args:
+            plan (Plan): The test plan.
+            work_dir (str): The directory where the test result and trace will be generated.
+            filter (Optional[str]): Specifies the test(s) to run.
+            resume (bool): Whether to resume a previous run in `work_dir`.
+            reuse_passed (bool): Whether to reuse cached passing results.
+            cache_dir (Optional[str]): The directory of the result cache.
+            cache_ttl_hours (Optional[float]): The number of hours a cached result can be reused.
+            fail_fast (Optional[int]): The number of failed tests after which the plan is stopped.
+            repeat (int): The number of independent runs of each test.
+        """
+        if repeat < 1:
+            raise ValueError("repeat must be at least 1")
+
+        self._queue.append(
+            (
+                plan,
+                dict(
+                    work_dir=work_dir,
+                    filter=filter,
+                    resume=resume,
+                    reuse_passed=reuse_passed,
+                    cache_dir=cache_dir,
+                    cache_ttl_hours=cache_ttl_hours,
+                    fail_fast=fail_fast,
+                    repeat=repeat,
+                ),
+            )
+        )
+
+    def run(self) -> list[PlanRun]:
+        """Run the queued plans.
+
+        Returns:
+            list[PlanRun]: The outcome of each plan, in the order they were added.
+        """
+        configure_logger()
+        plans = [plan for plan, _ in self._queue]
+        runs = sorted(
+            (
+                (plan, test, repetition)
+                for plan, options in self._queue
+                for test, repetition in plan.prepare(**options)
+            ),
+            key=lambda run: run[0].expected_duration(run[1]),
+            reverse=True,
+        )
+        self._queue = []
+
+        num_threads = (
+            min(max(len(runs), 1), defaults.MAX_NUM_THREADS)
+            if self.num_threads is None
+            else self.num_threads
+        )
+        configure_client_pool(max_pool_connections=num_threads)
+        log_run_start(self.verbose, len(runs), num_threads)
+
+        start = time.time()
+        # the start and end of each piece of work of a plan, as the plans share the pool
+        spans = {id(plan): [] for plan in plans}
+
+        with (
+            Progress(transient=True) if self.show_progress else contextlib.nullcontext()
+        ) as progress, contextlib.ExitStack() as stack:
+            tracker = progress.add_task("running...", total=len(runs)) if progress else None
+            for plan in plans:
+                stack.enter_context(plan.running(progress, tracker))
+            self._run_concurrent(runs, num_threads, spans)
+            for plan in plans:
+                # conversations left pending evaluation by a resumed pipeline run
+                _timed(spans[id(plan)], plan.finish_tests, self.verbose, self.num_threads)
+
+        outcomes = []
+        for plan in plans:
+            plan_start = min((s for s, _ in spans[id(plan)]), default=start)
+            plan_end = max((e for _, e in spans[id(plan)]), default=start)
+            elapsed_time = round(plan_end - plan_start, 2)
+            passed = plan.finish(self.verbose, elapsed_time)
+            outcomes.append(
+                PlanRun(
+                    work_dir=plan.work_dir,
+                    results=plan.results(),
+                    passed=passed,
+                    start_time=datetime.fromtimestamp(plan_start),
+                    end_time=datetime.fromtimestamp(plan_end),
+                    elapsed_time=elapsed_time,
+                )
+            )
+        return outcomes
+
+    def _run_concurrent(self, runs: list, num_threads: int, spans: dict):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
+            futures = {
+                executor.submit(
+                    _timed, spans[id(plan)], plan.run_one, test, repetition
+                ): plan
+                for plan, test, repetition in runs
+            }
+            stopping_all = False
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                future.result()
+                stopped = futures[future]
+                if not stopped.stopped or stopping_all:
+                    continue
+                if self.stop_all:
+                    stopping_all = True
+                    others = {
+                        id(plan): plan for plan in futures.values() if plan is not stopped
+                    }
+                    for plan in others.values():
+                        plan.stop(f"The run was stopped by fail-fast in {stopped.work_dir}.")
+                # unless `stop_all`, a plan stopped by fail-fast does not affect the others
+                for pending, plan in futures.items():
+                    if stopping_all or plan is stopped:
+                        pending.cancel()
+
+
+def _timed(span: list, fn, *args):
+    start = time.time()
+    try:
+        fn(*args)
+    finally:
+        span.append((start, time.time()))
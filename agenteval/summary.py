@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import os
+from typing import Iterable, Optional
 
 from agenteval import jinja_env
 from agenteval.metrics import calculate_pass_rate_metric
@@ -16,7 +17,8 @@ def create_markdown_summary(
     pass_count: int,
     num_tests: int,
     tests: list[Test],
-    test_results: list[TestResult],
+    test_results: Iterable[TestResult],
+    repetition_stats: Optional[list[dict]] = None,
 ):
     """
     Create a Markdown summary of the test results.
@@ -24,14 +26,22 @@ def create_markdown_summary(
     This function uses a Jinja2 template to render a Markdown summary of the
     provided tests and test results.
 
-    The summary is then written to a file in the specified working directory.
+    The summary is streamed to a file in the specified working directory as it is
+    rendered, so `test_results` can be a lazy, re-iterable view (e.g. read from the
+    results journal) and only one result needs to be held in memory at a time.
 
     Args:
         work_dir (str): The directory where the summary file will be created.
-        pass_count (int): The number of tests that passed.
-        num_tests (int): The total number of tests.
+        pass_count (int): The number of tests that passed. When tests are repeated,
+            the number of passing runs.
+        num_tests (int): The total number of tests. When tests are repeated, the
+            total number of runs.
         tests (list[Test]): A list of tests.
-        test_results (list[TestResult]): A list of test results.
+        test_results (Iterable[TestResult]): The test results, in the same order as `tests`.
+            It is iterated more than once. When tests are repeated, one representative
+            result per test.
+        repetition_stats (Optional[list[dict]]): The pass rate, confidence interval and
+            latency spread of each test, when tests are repeated.
 
     Returns:
         None
@@ -41,14 +51,18 @@ def create_markdown_summary(
 
     metrics = {"pass_rate": calculate_pass_rate_metric(pass_count, num_tests)}
 
-    rendered = template.render(
-        tests=tests, results=test_results, zip=zip, metrics=metrics
+    rendered = template.generate(
+        tests=tests,
+        results=test_results,
+        zip=zip,
+        metrics=metrics,
+        repetition_stats=repetition_stats,
     )
 
     _write_summary(summary_path, rendered)
 
 
-def _write_summary(path: str, summary: str):
+def _write_summary(path: str, summary: Iterable[str]):
     with open(path, "w+", encoding='utf-8') as f:
-        f.write(summary)
+        f.writelines(summary)
         
@@ -4,14 +4,14 @@
 from typing import Optional
 
 from agenteval.targets import BaseTarget
-from agenteval.utils import create_boto3_client
+from agenteval.utils import get_boto3_client
 
 
 class Boto3Target(BaseTarget):
     """A target that can be interfaced with via the `boto3` library.
 
     Attributes:
-        boto3_client (BaseClient): A `boto3` client.
+        boto3_client (BaseClient): A `boto3` client taken from the shared client pool.
     """
 
     def __init__(
@@ -33,7 +33,7 @@ class Boto3Target(BaseTarget):
             max_retry (int): The maximum number of retry attempts.
         """
 
-        self.boto3_client = create_boto3_client(
+        self.boto3_client = get_boto3_client(
             boto3_service_name=boto3_service_name,
             aws_profile=aws_profile,
             aws_region=aws_region,
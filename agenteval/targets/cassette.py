@@ -0,0 +1,257 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from agenteval.targets import BaseTarget, TargetResponse
+
+RECORD_MODE = "record"
+REPLAY_MODE = "replay"
+STRICT_MODE = "strict"
+MODES = [RECORD_MODE, REPLAY_MODE, STRICT_MODE]
+
+_DEFAULT_CASSETTE_DIR = "agenteval_cassettes"
+_CASSETTE_SUFFIX = ".json.gz"
+# hex digits of the target configuration digest in the cassette file name
+_CONFIG_DIGEST_LENGTH = 12
+
+_registry_lock = threading.Lock()
+_cassettes: dict[str, "Cassette"] = {}
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMissError(Exception):
+    """An exception raised when a replayed target call was not recorded."""
+
+    def __init__(self, message="The target call was not recorded"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class Cassette:
+    """The recorded target responses of a test, stored as a gzipped JSON file.
+
+    Each interaction is identified by its turn in the conversation and the prompt
+    sent to the target.
+
+    Attributes:
+        path (str): The path to the cassette file.
+    """
+
+    def __init__(self, path: str, load: bool = True):
+        """
+        Initialize the cassette.
+
+        Args:
+            path (str): The path to the cassette file.
+            load (bool): Whether to load the interactions already recorded in the file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # interactions by turn, then by prompt
+        self._turns: dict[int, dict[str, dict]] = {}
+        if load:
+            self._load()
+
+    def _load(self):
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                interactions = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning(f"Ignoring unreadable cassette at {self.path}")
+            return
+        for interaction in interactions:
+            self._turns.setdefault(interaction["turn"], {})[
+                interaction["prompt"]
+            ] = interaction
+
+    def get(self, turn: int, prompt: str, strict: bool) -> Optional[dict]:
+        """Get the interaction recorded for a call.
+
+        Args:
+            turn (int): The turn of the call, starting at `1`.
+            prompt (str): The prompt sent to the target.
+            strict (bool): Whether the prompt must match. Otherwise the first
+                interaction recorded for the turn is used when the prompt has changed.
+
+        Returns:
+            Optional[dict]: The interaction, or `None` if none matches.
+        """
+        with self._lock:
+            recorded = self._turns.get(turn, {})
+            interaction = recorded.get(prompt)
+            if interaction is None and not strict and recorded:
+                interaction = next(iter(recorded.values()))
+            return interaction
+
+    def put(self, turn: int, prompt: str, response: TargetResponse, elapsed: float):
+        """Record an interaction and save the cassette.
+
+        Args:
+            turn (int): The turn of the call, starting at `1`.
+            prompt (str): The prompt sent to the target.
+            response (TargetResponse): The target's response.
+            elapsed (float): The duration of the call in seconds.
+        """
+        with self._lock:
+            self._turns.setdefault(turn, {})[prompt] = {
+                "turn": turn,
+                "prompt": prompt,
+                "response": response.model_dump(mode="json"),
+                "elapsed": round(elapsed, 3),
+            }
+            interactions = [
+                interaction
+                for recorded_turn in sorted(self._turns)
+                for interaction in self._turns[recorded_turn].values()
+            ]
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(interactions, f, separators=(",", ":"), default=str)
+            os.replace(tmp_path, self.path)
+
+
+def get_cassette_file_name(
+    test_name: str, target_config: dict, repetition: Optional[int] = None
+) -> str:
+    """Get the name of the cassette file of a test.
+
+    The name includes the repetition and a digest of the target configuration, so
+    the repetitions of a test, and plans sharing a directory with different targets,
+    do not overwrite each other's recordings.
+
+    Args:
+        test_name (str): Name of the test.
+        target_config (dict): The configuration of the recorded target.
+        repetition (Optional[int]): The repetition of the test, if the test is repeated.
+
+    Returns:
+        str: The file name.
+    """
+    digest = hashlib.sha256(
+        json.dumps(target_config, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:_CONFIG_DIGEST_LENGTH]
+    name = test_name if repetition is None else f"{test_name}_rep{repetition}"
+    return f"{name}.{digest}{_CASSETTE_SUFFIX}"
+
+
+def get_cassette(path: str, mode: str) -> Cassette:
+    """Get the process-wide cassette for a path.
+
+    When recording, the cassette is started empty the first time it is used in the
+    process.
+
+    Args:
+        path (str): The path to the cassette file.
+        mode (str): The cassette mode.
+
+    Returns:
+        Cassette
+    """
+    key = os.path.abspath(path)
+    with _registry_lock:
+        cassette = _cassettes.get(key)
+        if cassette is None:
+            cassette = Cassette(path, load=mode != RECORD_MODE)
+            _cassettes[key] = cassette
+        return cassette
+
+
+class CassetteTarget(BaseTarget):
+    """A target that records the responses of another target or replays them.
+
+    In `record` mode every call is made to the wrapped target and recorded. In
+    `replay` mode recorded responses are served without creating the wrapped target;
+    a turn whose prompt has changed gets the response first recorded for that turn.
+    `strict` mode only serves a response recorded for the exact turn and prompt.
+    Replaying a turn that was never recorded raises `CassetteMissError`.
+    """
+
+    def __init__(
+        self,
+        test_name: str,
+        create_target: Callable[[], BaseTarget],
+        target_config: dict,
+        mode: str = REPLAY_MODE,
+        dir: Optional[str] = None,
+        latency_scale: float = 0.0,
+        repetition: Optional[int] = None,
+        work_dir: Optional[str] = None,
+    ):
+        """
+        Initialize the cassette target.
+
+        Args:
+            test_name (str): Name of the test, which names the cassette file.
+            create_target (Callable[[], BaseTarget]): Creates the wrapped target.
+                Only called when recording.
+            target_config (dict): The configuration of the wrapped target, whose
+                digest names the cassette file.
+            mode (str): `"record"`, `"replay"` or `"strict"`.
+            dir (Optional[str]): The directory of the cassettes. If `None`,
+                `agenteval_cassettes` in `work_dir` is used.
+            latency_scale (float): The share of the recorded latency a replayed
+                response waits for. `0` replays at once, `1` at the recorded speed.
+            repetition (Optional[int]): The repetition of the test, if the test is
+                repeated. Each repetition is recorded to its own cassette.
+            work_dir (Optional[str]): The directory of the run. If `None`, the current
+                working directory is used.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.cassette = get_cassette(
+            os.path.join(
+                dir or os.path.join(work_dir or os.getcwd(), _DEFAULT_CASSETTE_DIR),
+                get_cassette_file_name(test_name, target_config, repetition),
+            ),
+            mode,
+        )
+        self._test_name = test_name
+        self._target = create_target() if mode == RECORD_MODE else None
+        self._turn = 0
+
+    def start_new_session(self, session_id: Optional[str] = None) -> None:
+        self._turn = 0
+        if self._target is not None and hasattr(self._target, "start_new_session"):
+            self._target.start_new_session(session_id)
+
+    def _replayed(self, prompt: str) -> tuple[TargetResponse, float]:
+        interaction = self.cassette.get(
+            self._turn, prompt, strict=self.mode == STRICT_MODE
+        )
+        if interaction is None:
+            raise CassetteMissError(
+                f"No recorded target response for turn {self._turn} of "
+                f"'{self._test_name}' in {self.cassette.path}"
+            )
+        response = TargetResponse.model_validate(interaction["response"])
+        return response, interaction["elapsed"] * self.latency_scale
+
+    def invoke(self, prompt: str, **kwargs) -> TargetResponse:
+        self._turn += 1
+        if self._target is None:
+            response, delay = self._replayed(prompt)
+            if delay:
+                time.sleep(delay)
+            return response
+
+        start = time.monotonic()
+        response = self._target.invoke(prompt, **kwargs)
+        self.cassette.put(self._turn, prompt, response, time.monotonic() - start)
+        return response
@@ -1,28 +1,30 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+from typing import Optional
+
 from pydantic import BaseModel
 
 from agenteval.targets import BaseTarget
-from agenteval.targets.bedrock_agent import BedrockAgentTarget
-from agenteval.targets.bedrock_flow import BedrockFlowTarget
-from agenteval.targets.bedrock_knowledge_base import BedrockKnowledgeBaseTarget
-from agenteval.targets.langchain_agent import LangChainAgentTarget
-from agenteval.targets.lexv2 import LexV2Target
-from agenteval.targets.q_business import QBusinessTarget
-from agenteval.targets.sagemaker_endpoint import SageMakerEndpointTarget
-from agenteval.utils import import_class
+from agenteval.targets.cassette import CassetteTarget
+from agenteval.utils import import_class, import_registered_class
 
+# targets are imported on first use, so a run only loads the modules (and
+# dependencies) of the target it uses
 _TARGET_MAP = {
-    "bedrock-agent": BedrockAgentTarget,
-    "bedrock-flow": BedrockFlowTarget,
-    "langchain-agent": LangChainAgentTarget,
-    "q-business": QBusinessTarget,
-    "sagemaker-endpoint": SageMakerEndpointTarget,
-    "bedrock-knowledge-base": BedrockKnowledgeBaseTarget,
-    "lex-v2": LexV2Target,
+    "bedrock-agent": "agenteval.targets.bedrock_agent.BedrockAgentTarget",
+    "bedrock-flow": "agenteval.targets.bedrock_flow.BedrockFlowTarget",
+    "langchain-agent": "agenteval.targets.langchain_agent.LangChainAgentTarget",
+    "q-business": "agenteval.targets.q_business.QBusinessTarget",
+    "sagemaker-endpoint": "agenteval.targets.sagemaker_endpoint.SageMakerEndpointTarget",
+    "bedrock-knowledge-base": "agenteval.targets.bedrock_knowledge_base.BedrockKnowledgeBaseTarget",
+    "lex-v2": "agenteval.targets.lexv2.LexV2Target",
 }
 
+# settings handled by the factory rather than passed to the target
+_CASSETTE_CONFIG_KEY = "cassette"
+_RESERVED_CONFIG_KEYS = {"type", _CASSETTE_CONFIG_KEY}
+
 
 class TargetFactory(BaseModel):
     """A factory for creating instances of `BaseTarget` subclasses.
@@ -34,20 +36,52 @@ class TargetFactory(BaseModel):
 
     config: dict
 
-    def create(self) -> BaseTarget:
+    def create(
+        self,
+        test_name: Optional[str] = None,
+        repetition: Optional[int] = None,
+        work_dir: Optional[str] = None,
+    ) -> BaseTarget:
         """Create an instance of the target class specified in the configuration.
 
+        If the configuration has a `cassette` section and a test name is given, the
+        target is wrapped in a `CassetteTarget` that records or replays its responses.
+
+        Args:
+            test_name (Optional[str]): Name of the test the target is created for.
+            repetition (Optional[int]): The repetition of the test, if the test is repeated.
+            work_dir (Optional[str]): The directory of the run, where cassettes are
+                kept unless the `cassette` section sets a `dir`.
+
         Returns:
             BaseTarget: An instance of the target class, with the configuration
                 parameters applied.
         """
+        cassette_config = self.config.get(_CASSETTE_CONFIG_KEY)
+        if cassette_config and test_name:
+            return CassetteTarget(
+                test_name=test_name,
+                create_target=self._create_target,
+                target_config={
+                    k: v for k, v in self.config.items() if k != _CASSETTE_CONFIG_KEY
+                },
+                repetition=repetition,
+                work_dir=work_dir,
+                **cassette_config,
+            )
+
+        return self._create_target()
+
+    def _create_target(self) -> BaseTarget:
         target_cls = self._get_target_class()
 
-        return target_cls(**{k: v for k, v in self.config.items() if k != "type"})
+        return target_cls(
+            **{k: v for k, v in self.config.items() if k not in _RESERVED_CONFIG_KEYS}
+        )
 
     def _get_target_class(self) -> type[BaseTarget]:
         if self.config["type"] in _TARGET_MAP:
-            target_cls = _TARGET_MAP[self.config["type"]]
+            target_cls = import_registered_class(_TARGET_MAP[self.config["type"]])
         else:
             target_cls = import_class(self.config["type"], parent_class=BaseTarget)
 
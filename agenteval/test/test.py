@@ -1,7 +1,7 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from typing import Optional, Dict
+from typing import Annotated, Dict, Literal, Optional, Union
 from pydantic import BaseModel, Field
 
 
@@ -17,6 +17,11 @@ class Test(BaseModel, validate_assignment=True):
         hook: The module path to an evaluation hook.
         bedrock_prompt_session_attributes: Prompt session attributes specific to this test.
         bedrock_session_attributes: Session attributes specific to this test.
+        timeout_seconds: Maximum wall-clock time allowed for the whole test.
+        turn_timeout_seconds: Maximum wall-clock time allowed for each conversation turn.
+        status_check_min_turns: Number of turns before the test status is first checked, or
+            `"steps"` to wait until there are as many turns as steps.
+        status_check_every_turns: Number of turns between status checks once they start.
     """
 
     # do not collect as a pytest
@@ -30,3 +35,9 @@ class Test(BaseModel, validate_assignment=True):
     hook: Optional[str] = None
     bedrock_prompt_session_attributes: Dict[str, str] = Field(default_factory=dict)
     bedrock_session_attributes: Dict[str, str] = Field(default_factory=dict)
+    timeout_seconds: Optional[float] = Field(default=None, gt=0)
+    turn_timeout_seconds: Optional[float] = Field(default=None, gt=0)
+    status_check_min_turns: Optional[
+        Union[Annotated[int, Field(gt=0)], Literal["steps"]]
+    ] = None
+    status_check_every_turns: Optional[int] = Field(default=None, gt=0)
@@ -1,7 +1,10 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, field_serializer, field_validator
 
 from agenteval.conversation import Conversation
 
@@ -15,6 +18,11 @@ class TestResult(BaseModel, arbitrary_types_allowed=True):
         reasoning: The rationale for the test result.
         passed: `True` if the test passed, otherwise `False`.
         conversation: Captures the interaction between a user and an agent.
+        skipped: `True` if the test was not run to completion because the run was stopped.
+        pending_evaluation: `True` if the conversation is complete and its evaluation
+            against the expected results is deferred to a later phase of the run.
+        start_time: When the evaluation of the test started.
+        end_time: When the evaluation of the test ended.
     """
 
     # do not collect as a pytest
@@ -26,3 +34,18 @@ class TestResult(BaseModel, arbitrary_types_allowed=True):
     passed: bool
     conversation: Conversation
     conversation_id: str = ""
+    skipped: bool = False
+    pending_evaluation: bool = False
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+    @field_validator("conversation", mode="before")
+    @classmethod
+    def _load_conversation(cls, value):
+        if isinstance(value, dict):
+            return Conversation.from_dict(value)
+        return value
+
+    @field_serializer("conversation")
+    def _dump_conversation(self, conversation: Conversation) -> dict:
+        return conversation.to_dict()
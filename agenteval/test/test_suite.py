@@ -42,21 +42,30 @@ class TestSuite(BaseModel):
         return len(self.tests)
 
     @classmethod
-    def load(cls, config: dict[str, dict], filter: Optional[str]) -> TestSuite:
+    def load(
+        cls,
+        config: dict[str, dict],
+        filter: Optional[str],
+        test_defaults: Optional[dict] = None,
+    ) -> TestSuite:
         """Loads a `TestSuite` from a list of test configurations and an optional filter.
 
         Args:
             config (dict[str, dict]): A dictionary of test configurations, where
                 the keys are the test names and the values are the test cases as dictionaries.
             filter (Optional[str]): A filter string to apply when loading the tests.
+            test_defaults (Optional[dict]): Settings applied to every test that does not
+                set them itself (the `test_defaults` section of the plan).
 
         Returns:
             TestSuite: A `TestSuite` instance containing the loaded tests.
         """
-        return cls(tests=TestSuite._load_tests(config, filter))
+        return cls(tests=TestSuite._load_tests(config, filter, test_defaults or {}))
 
     @staticmethod
-    def _load_tests(config: dict[str, dict], filter: Optional[str]) -> list[Test]:
+    def _load_tests(
+        config: dict[str, dict], filter: Optional[str], test_defaults: dict
+    ) -> list[Test]:
         tests = []
 
         if filter:
@@ -65,7 +74,7 @@ class TestSuite(BaseModel):
             names = config.keys()
 
         for name in names:
-            cfg = dict(config[name])
+            cfg = {**test_defaults, **config[name]}
             cfg.setdefault("max_turns", defaults.MAX_TURNS)
             cfg["name"] = name
             tests.append(Test(**cfg))
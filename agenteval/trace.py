@@ -1,15 +1,32 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import contextlib
 import inspect
 import json
 import os
+import threading
 from datetime import datetime, timezone
 from typing import Optional
 
 _TRACE_DIR = "agenteval_traces"
 
 
+def get_trace_file_name(test_name: str, repetition: Optional[int] = None) -> str:
+    """Get the name of the trace file of a test.
+
+    Args:
+        test_name (str): Name of the test.
+        repetition (Optional[int]): The repetition of the test, if the test is repeated.
+
+    Returns:
+        str: The file name.
+    """
+    if repetition is None:
+        return f"{test_name}.json"
+    return f"{test_name}_rep{repetition}.json"
+
+
 class Trace:
     """A context manager which captures steps taken during evaluation.
 
@@ -21,44 +38,72 @@ class Trace:
         start_time (datetime): Start time of the trace.
         end_time (datetime): End time of the trace.
         steps (list): List of steps in the trace.
+        repetition (Optional[int]): The repetition of the test, if the test is repeated.
 
     """
 
-    def __init__(self, test_name: str, work_dir: str):
+    def __init__(self, test_name: str, work_dir: str, repetition: Optional[int] = None):
         """
         Initialize the trace handler.
 
         Args:
             test_name (str): Name of the test.
             work_dir (str): Directory to store the trace.
+            repetition (Optional[int]): The repetition of the test, if the test is repeated.
         """
         self.test_name = test_name
+        self.repetition = repetition
         self.trace_dir = os.path.join(work_dir, _TRACE_DIR)
         self.start_time = None
         self.end_time = None
         self.steps = []
+        self._local = threading.local()
 
     def __enter__(self):
-        self.start_time = datetime.now(timezone.utc)
+        # a loaded trace keeps the start time of the run that recorded it
+        if self.start_time is None:
+            self.start_time = datetime.now(timezone.utc)
         return self
 
     def __exit__(self, *exc):
         self.end_time = datetime.now(timezone.utc)
         self._dump_trace()
 
+    def _trace_path(self) -> str:
+        return os.path.join(
+            self.trace_dir, get_trace_file_name(self.test_name, self.repetition)
+        )
+
     def _dump_trace(self):
         os.makedirs(self.trace_dir, exist_ok=True)
 
-        with open(os.path.join(self.trace_dir, f"{self.test_name}.json"), "w") as f:
+        with open(self._trace_path(), "w") as f:
             json.dump(self._get_trace(), f, default=str)
 
+    def load(self):
+        """Load the steps of a trace previously dumped for the test, so that new
+        steps are appended to them. Nothing is loaded if there is no such trace.
+        """
+        try:
+            with open(self._trace_path(), "r") as f:
+                trace = json.load(f)
+        except FileNotFoundError:
+            return
+
+        self.steps = trace.get("steps", [])
+        if trace.get("start_time"):
+            self.start_time = datetime.fromisoformat(trace["start_time"])
+
     def _get_trace(self) -> str:
-        return {
+        trace = {
             "test_name": self.test_name,
             "start_time": self.start_time,
             "end_time": self.end_time,
             "steps": self.steps,
         }
+        if self.repetition is not None:
+            trace["repetition"] = self.repetition
+        return trace
 
     def add_step(self, step_name: Optional[str] = None, **kwargs):
         """Add a step to the trace.
@@ -70,4 +115,27 @@ class Trace:
         step_name = step_name or inspect.stack()[1].function
         step = {"timestamp": datetime.now(timezone.utc), "step_name": step_name}
         step.update(kwargs)
-        self.steps.append(step)
+        self.extend([step])
+
+    def extend(self, steps: list):
+        """Add steps already built, e.g. ones collected by `collect_steps`.
+
+        Args:
+            steps (list): The steps.
+        """
+        collected = getattr(self._local, "steps", None)
+        (self.steps if collected is None else collected).extend(steps)
+
+    @contextlib.contextmanager
+    def collect_steps(self, steps: list):
+        """Collect the steps added from the current thread into a list instead of the trace.
+
+        Args:
+            steps (list): The list receiving the steps.
+        """
+        previous = getattr(self._local, "steps", None)
+        self._local.steps = steps
+        try:
+            yield
+        finally:
+            self._local.steps = previous
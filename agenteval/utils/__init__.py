@@ -1,7 +1,30 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from .aws import create_boto3_client
-from .imports import import_class
+from .aws import (
+    add_call_listener,
+    clear_client_pool,
+    configure_client_pool,
+    create_boto3_client,
+    get_boto3_client,
+    remove_call_listener,
+)
+from .imports import import_class, import_registered_class
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .response_cache import ResponseCache, ResponseCacheMissError, get_response_cache
 
-__all__ = ["import_class", "create_boto3_client"]
+__all__ = [
+    "import_class",
+    "import_registered_class",
+    "create_boto3_client",
+    "get_boto3_client",
+    "configure_client_pool",
+    "clear_client_pool",
+    "add_call_listener",
+    "remove_call_listener",
+    "RateLimiter",
+    "get_rate_limiter",
+    "ResponseCache",
+    "ResponseCacheMissError",
+    "get_response_cache",
+]
@@ -1,14 +1,45 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from typing import Optional
+from __future__ import annotations
 
-import boto3
-from botocore.client import BaseClient
-from botocore.config import Config
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+# boto3 takes a large share of the CLI start-up time, so it is only imported once a
+# client is actually needed
+if TYPE_CHECKING:
+    import boto3
+    from botocore.client import BaseClient
 
 _RETRY_MODE = "adaptive"
 
+# botocore's default size of the urllib3 connection pool
+_DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+_pool_lock = threading.Lock()
+_session_pool: dict[tuple, boto3.Session] = {}
+_client_pool: dict[tuple, BaseClient] = {}
+_max_pool_connections = _DEFAULT_MAX_POOL_CONNECTIONS
+
+_THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ProvisionedThroughputExceededException",
+}
+_CALL_START_CONTEXT_KEY = "agenteval_call_start"
+
+_listeners_lock = threading.Lock()
+_call_listeners: list[Callable[[str, bool, Optional[float]], None]] = []
+
+logger = logging.getLogger(__name__)
+
 
 def create_boto3_client(
     boto3_service_name: str,
@@ -16,6 +47,7 @@ def create_boto3_client(
     aws_region: Optional[str],
     endpoint_url: Optional[str],
     max_retry: int,
+    max_pool_connections: Optional[int] = None,
 ) -> BaseClient:
     """Create a `boto3` client.
 
@@ -25,12 +57,174 @@ def create_boto3_client(
         aws_region (Optional[str]): The AWS region.
         endpoint_url (Optional[str]): The endpoint URL for the AWS service.
         max_retry (int): The maximum number of retry attempts.
+        max_pool_connections (Optional[int]): The maximum number of connections to keep
+            in the client's connection pool. If `None`, the botocore default is used.
 
     Returns:
         BaseClient
     """
+    import boto3
+    from botocore.config import Config
 
-    config = Config(retries={"max_attempts": max_retry, "mode": _RETRY_MODE})
+    config = Config(
+        retries={"max_attempts": max_retry, "mode": _RETRY_MODE},
+        max_pool_connections=max_pool_connections or _DEFAULT_MAX_POOL_CONNECTIONS,
+    )
 
     session = boto3.Session(profile_name=aws_profile, region_name=aws_region)
     return session.client(boto3_service_name, endpoint_url=endpoint_url, config=config)
+
+
+def configure_client_pool(max_pool_connections: int):
+    """Set the connection pool size of the clients returned by `get_boto3_client`.
+
+    The size only grows: a smaller request than the current size is ignored. Pooled
+    clients are resized in place, so they keep being shared.
+
+    Args:
+        max_pool_connections (int): The number of concurrent connections each
+            pooled client should support (e.g. the number of threads in a run).
+    """
+    global _max_pool_connections
+
+    with _pool_lock:
+        if max_pool_connections <= _max_pool_connections:
+            return
+        _max_pool_connections = max_pool_connections
+        for client in _client_pool.values():
+            _resize_connection_pool(client, max_pool_connections)
+
+
+def _resize_connection_pool(client: BaseClient, max_pool_connections: int):
+    # botocore has no public API for this: its urllib3 pool managers create the pool of
+    # each host from their keyword arguments, so new pools get the new size once the
+    # current ones are cleared
+    try:
+        http_session = client._endpoint.http_session
+        http_session._max_pool_connections = max_pool_connections
+        managers = [http_session._manager, *http_session._proxy_managers.values()]
+    except AttributeError:
+        logger.debug("Cannot resize the connection pool of a boto3 client")
+        return
+    for manager in managers:
+        manager.connection_pool_kw["maxsize"] = max_pool_connections
+        manager.clear()
+
+
+def get_boto3_client(
+    boto3_service_name: str,
+    aws_profile: Optional[str],
+    aws_region: Optional[str],
+    endpoint_url: Optional[str],
+    max_retry: int,
+) -> BaseClient:
+    """Get a `boto3` client from the process-wide client pool.
+
+    Clients are shared across threads and keyed by service, profile, region, endpoint
+    URL and retry configuration, so the botocore service model, the credentials and
+    the underlying connections are only set up once per run. Their connection pool
+    size is set by `configure_client_pool`.
+
+    Args:
+        boto3_service_name (str): The `boto3` service name (e.g `"bedrock-runtime"`).
+        aws_profile (Optional[str]): The AWS profile name.
+        aws_region (Optional[str]): The AWS region.
+        endpoint_url (Optional[str]): The endpoint URL for the AWS service.
+        max_retry (int): The maximum number of retry attempts.
+
+    Returns:
+        BaseClient
+    """
+    with _pool_lock:
+        key = (
+            boto3_service_name,
+            aws_profile,
+            aws_region,
+            endpoint_url,
+            max_retry,
+            _RETRY_MODE,
+        )
+        client = _client_pool.get(key)
+
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            # boto3 sessions are not thread-safe, so they are only used under the lock
+            session_key = (aws_profile, aws_region)
+            session = _session_pool.get(session_key)
+            if session is None:
+                session = boto3.Session(profile_name=aws_profile, region_name=aws_region)
+                _session_pool[session_key] = session
+
+            client = session.client(
+                boto3_service_name,
+                endpoint_url=endpoint_url,
+                config=Config(
+                    retries={"max_attempts": max_retry, "mode": _RETRY_MODE},
+                    max_pool_connections=_max_pool_connections,
+                ),
+            )
+            _register_call_observers(client)
+            _client_pool[key] = client
+
+        return client
+
+
+def clear_client_pool():
+    """Discard all pooled sessions and clients (e.g. after credentials have expired)."""
+    with _pool_lock:
+        _client_pool.clear()
+        _session_pool.clear()
+
+
+def add_call_listener(listener: Callable[[str, bool, Optional[float]], None]):
+    """Register a listener notified about the calls made by pooled clients.
+
+    The listener is called with the service name, whether the attempt was throttled
+    and the latency of the call in seconds. Throttled attempts, which botocore retries
+    transparently, are reported with a latency of `None`.
+
+    Args:
+        listener (Callable[[str, bool, Optional[float]], None]): The listener.
+    """
+    with _listeners_lock:
+        _call_listeners.append(listener)
+
+
+def remove_call_listener(listener: Callable[[str, bool, Optional[float]], None]):
+    """Unregister a listener added with `add_call_listener`."""
+    with _listeners_lock:
+        if listener in _call_listeners:
+            _call_listeners.remove(listener)
+
+
+def _notify_call_listeners(service_name: str, throttled: bool, latency: Optional[float]):
+    with _listeners_lock:
+        listeners = list(_call_listeners)
+    for listener in listeners:
+        listener(service_name, throttled, latency)
+
+
+def _register_call_observers(client: BaseClient):
+    service_name = client.meta.service_model.service_name
+    events = client.meta.events
+
+    def _on_before_call(context, **kwargs):
+        context[_CALL_START_CONTEXT_KEY] = time.monotonic()
+
+    def _on_after_call(context, http_response, **kwargs):
+        start = context.get(_CALL_START_CONTEXT_KEY)
+        if start is not None and http_response.status_code < 400:
+            _notify_call_listeners(service_name, False, time.monotonic() - start)
+
+    def _on_needs_retry(response, **kwargs):
+        if response is not None:
+            code = response[1].get("Error", {}).get("Code")
+            if code in _THROTTLING_ERROR_CODES:
+                _notify_call_listeners(service_name, True, None)
+        # never influence botocore's retry decision
+
+    events.register("before-call", _on_before_call)
+    events.register("after-call", _on_after_call)
+    events.register("needs-retry", _on_needs_retry)
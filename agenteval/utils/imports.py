@@ -38,6 +38,23 @@ def import_class(module_path: str, parent_class: Optional[type] = None) -> type:
     return cls
 
 
+def import_registered_class(import_path: str) -> type:
+    """Import a class registered by its import path.
+
+    Used by the built-in registries, which name their classes by import path so that
+    a module is only imported once one of its classes is needed. Unlike
+    `import_class`, the module name is not validated.
+
+    Args:
+        import_path (str): The full import path to the class, e.g. "my.module.ClassName".
+
+    Returns:
+        type
+    """
+    name, class_name = import_path.rsplit(".", 1)
+    return getattr(import_module(name), class_name)
+
+
 def _validate_module_name(name: str):
     if not any(name.endswith(suffix) for suffix in _ALLOWED_MODULE_NAME_SUFFIX):
         raise ValueError(f"Invalid module name: {name}")
@@ -0,0 +1,155 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+from typing import Optional
+
+_SECONDS_PER_MINUTE = 60
+
+_registry_lock = threading.Lock()
+_rate_limiters: dict[str, "RateLimiter"] = {}
+
+
+class TokenBucket:
+    """A token bucket refilled continuously at a per-minute rate.
+
+    The bucket holds at most one minute worth of capacity. Consuming more than
+    is available leaves the bucket in debt, which is paid back by the refill
+    before the next acquisition is allowed.
+
+    Attributes:
+        per_minute (float): The number of units added to the bucket per minute.
+        level (float): The number of units currently available.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = per_minute
+        self._last_refill = time.monotonic()
+
+    def refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self.level = min(
+            self.per_minute, self.level + elapsed * self.per_minute / _SECONDS_PER_MINUTE
+        )
+
+    def wait_time(self, amount: float) -> float:
+        """Return the number of seconds until `amount` units are available."""
+        missing = amount - self.level
+        if missing <= 0:
+            return 0.0
+        return missing * _SECONDS_PER_MINUTE / self.per_minute
+
+    def consume(self, amount: float):
+        self.level -= amount
+
+
+class RateLimiter:
+    """A thread-safe limiter enforcing requests-per-minute and tokens-per-minute quotas.
+
+    Requests are admitted by `acquire`, which blocks until a request slot is free and
+    the token bucket is not in debt. Tokens are charged after the fact through
+    `charge_tokens`, since the number of tokens is only known once the model responds.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        """Initialize the rate limiter.
+
+        Args:
+            requests_per_minute (Optional[int]): The maximum number of requests per minute.
+                If `None`, requests are not limited.
+            tokens_per_minute (Optional[int]): The maximum number of tokens per minute.
+                If `None`, tokens are not limited.
+        """
+        self._lock = threading.Lock()
+        self._request_bucket = None
+        self._token_bucket = None
+        self.configure(requests_per_minute, tokens_per_minute)
+
+    def configure(
+        self,
+        requests_per_minute: Optional[int],
+        tokens_per_minute: Optional[int],
+    ):
+        """Update the quotas, keeping the current level of existing buckets."""
+        with self._lock:
+            self._request_bucket = self._update_bucket(
+                self._request_bucket, requests_per_minute
+            )
+            self._token_bucket = self._update_bucket(self._token_bucket, tokens_per_minute)
+
+    @staticmethod
+    def _update_bucket(
+        bucket: Optional[TokenBucket], per_minute: Optional[int]
+    ) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        if bucket is None:
+            return TokenBucket(per_minute)
+        bucket.per_minute = per_minute
+        bucket.level = min(bucket.level, per_minute)
+        return bucket
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                if self._request_bucket:
+                    self._request_bucket.refill(now)
+                    wait = self._request_bucket.wait_time(1)
+                if self._token_bucket:
+                    self._token_bucket.refill(now)
+                    # only wait for the bucket to get out of debt
+                    wait = max(wait, self._token_bucket.wait_time(0))
+                if wait <= 0:
+                    if self._request_bucket:
+                        self._request_bucket.consume(1)
+                    return
+            time.sleep(wait)
+
+    def charge_tokens(self, token_count: int):
+        """Charge the tokens processed by a request against the token bucket."""
+        with self._lock:
+            if self._token_bucket:
+                self._token_bucket.refill(time.monotonic())
+                self._token_bucket.consume(token_count)
+
+
+def get_rate_limiter(
+    key: str,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+) -> Optional[RateLimiter]:
+    """Get the process-wide rate limiter for a key (e.g. a Bedrock model ID).
+
+    Every caller using the same key shares one limiter, so the quotas hold across
+    all tests and plans running in the process. The most recent quotas provided
+    for a key take effect.
+
+    Args:
+        key (str): The key identifying the quota.
+        requests_per_minute (Optional[int]): The maximum number of requests per minute.
+        tokens_per_minute (Optional[int]): The maximum number of tokens per minute.
+
+    Returns:
+        Optional[RateLimiter]: The shared rate limiter, or `None` if no quota is provided.
+    """
+    if not requests_per_minute and not tokens_per_minute:
+        return None
+
+    with _registry_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _rate_limiters[key] = limiter
+        else:
+            limiter.configure(requests_per_minute, tokens_per_minute)
+        return limiter
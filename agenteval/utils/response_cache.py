@@ -0,0 +1,286 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import concurrent.futures
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+RECORD_MODE = "record"
+REPLAY_MODE = "replay"
+READ_THROUGH_MODE = "read-through"
+MODES = [RECORD_MODE, REPLAY_MODE, READ_THROUGH_MODE]
+
+_ENTRY_SUFFIX = ".json"
+
+# share of the size limit kept after an eviction, so evictions are not run on every write
+_EVICTION_TARGET = 0.9
+
+_registry_lock = threading.Lock()
+_response_caches: dict[str, "ResponseCache"] = {}
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheMissError(Exception):
+    """An exception raised when a replayed request has no cached response."""
+
+    def __init__(self, message="No cached response for the request"):
+        self.message = message
+        super().__init__(self.message)
+
+
+def encode_response(response: dict) -> dict:
+    """Convert an `InvokeModel` response into a JSON-serializable cache entry.
+
+    The response body is read, so the response itself can no longer be used.
+
+    Args:
+        response (dict): The response returned by `boto3`.
+
+    Returns:
+        dict: The cache entry.
+    """
+    return {
+        "body": response["body"].read().decode("utf-8"),
+        "content_type": response.get("contentType"),
+        "headers": response["ResponseMetadata"]["HTTPHeaders"],
+    }
+
+
+def decode_response(entry: dict) -> dict:
+    """Rebuild an `InvokeModel` response from a cache entry.
+
+    Args:
+        entry (dict): The cache entry.
+
+    Returns:
+        dict: A response with the same shape as the one returned by `boto3`.
+    """
+    return {
+        "body": io.BytesIO(entry["body"].encode("utf-8")),
+        "contentType": entry["content_type"],
+        "ResponseMetadata": {"HTTPHeaders": dict(entry["headers"])},
+    }
+
+
+class ResponseCache:
+    """An on-disk store of model responses keyed by a hash of the request.
+
+    Entries are JSON files sharded by the first characters of their key. Once the
+    store exceeds its size limit, the least recently used entries are removed.
+    Identical requests made while one of them is in flight share its response.
+
+    Attributes:
+        cache_dir (str): The directory holding the entries.
+        max_size (int): The maximum size of the store in bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): The directory where responses are stored.
+            max_size (int): The maximum size of the store in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, concurrent.futures.Future] = {}
+        self._size = None
+
+    @staticmethod
+    def key(model_id: str, request_body: dict) -> str:
+        """Compute the key of a request.
+
+        Args:
+            model_id (str): The model the request is sent to.
+            request_body (dict): The request payload.
+
+        Returns:
+            str: A hex digest identifying the request.
+        """
+        content = json.dumps(
+            {"model_id": model_id, "body": request_body}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}{_ENTRY_SUFFIX}")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Get the cached entry for a key.
+
+        Args:
+            key (str): The request key.
+
+        Returns:
+            Optional[dict]: The entry, or `None` if there is no readable entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignoring unreadable cached response at {path}")
+            return None
+
+        # the modification time orders entries for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: dict):
+        """Store the entry for a key, evicting old entries if the store is full.
+
+        Args:
+            key (str): The request key.
+            entry (dict): The entry to store.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        data = json.dumps(entry).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            # an entry written again replaces the previous file, whose size is no longer used
+            try:
+                previous_size = os.path.getsize(path)
+            except FileNotFoundError:
+                previous_size = 0
+            os.replace(tmp_path, path)
+
+            if self._size is None:
+                self._size = self._disk_size()
+            else:
+                self._size += len(data) - previous_size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(_ENTRY_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _disk_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        target = self.max_size * _EVICTION_TARGET
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def fetch(self, key: str, call: Callable[[], dict], mode: str) -> dict:
+        """Get the entry for a key according to the cache mode.
+
+        In `read-through` mode a cached entry is returned and a missing one is
+        fetched with `call` and stored. In `record` mode `call` is always made and
+        its entry stored. In `replay` mode only cached entries are returned.
+        Concurrent fetches of the same key wait for the first one.
+
+        Args:
+            key (str): The request key.
+            call (Callable[[], dict]): Makes the request and returns its entry.
+            mode (str): The cache mode.
+
+        Returns:
+            dict: The entry.
+
+        Raises:
+            ResponseCacheMissError: If the mode is `replay` and no entry is cached.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            entry = None if mode == RECORD_MODE else self.get(key)
+            if entry is None:
+                if mode == REPLAY_MODE:
+                    raise ResponseCacheMissError(
+                        f"No cached response for request {key} in {self.cache_dir}"
+                    )
+                entry = call()
+                self.put(key, entry)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def clear(self) -> int:
+        """Remove every entry from the cache.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        removed = 0
+        with self._lock:
+            for _, _, path in self._entries():
+                os.remove(path)
+                removed += 1
+            self._size = 0
+        return removed
+
+
+def get_response_cache(cache_dir: str, max_size: int) -> ResponseCache:
+    """Get the process-wide response cache for a directory.
+
+    Every evaluator using the same directory shares one cache, so identical
+    requests in flight across tests are made once. The most recent size limit
+    provided for a directory takes effect.
+
+    Args:
+        cache_dir (str): The directory where responses are stored.
+        max_size (int): The maximum size of the store in bytes.
+
+    Returns:
+        ResponseCache: The shared cache.
+    """
+    key = os.path.abspath(cache_dir)
+    with _registry_lock:
+        cache = _response_caches.get(key)
+        if cache is None:
+            cache = ResponseCache(cache_dir, max_size)
+            _response_caches[key] = cache
+        else:
+            cache.max_size = max_size
+        return cache
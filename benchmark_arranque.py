@@ -0,0 +1,98 @@
+"""Mide el tiempo de arranque en frío de `python -m agenteval`.
+
+Cada medición lanza un intérprete nuevo, igual que `agente-evaluador.py` al
+ejecutar un `.yml`, y toma el mínimo y la mediana de varias repeticiones.
+Con `--detalle` muestra además los módulos más lentos de importar según
+`python -X importtime`.
+
+Uso:
+    python benchmark_arranque.py
+    python benchmark_arranque.py -n 20 --detalle 15
+    python benchmark_arranque.py --json >> arranque.jsonl
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+COMANDOS = {
+    "import agenteval": [sys.executable, "-c", "import agenteval"],
+    "import agenteval.cli": [sys.executable, "-c", "import agenteval.cli"],
+    "agenteval run --help": [sys.executable, "-m", "agenteval", "run", "--help"],
+}
+
+
+def medir(comando: list[str], repeticiones: int) -> list[float]:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(comando, check=True, stdout=subprocess.DEVNULL)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def modulos_mas_lentos(cantidad: int) -> list[tuple[str, int]]:
+    """Devuelve los módulos con mayor tiempo acumulado de importación (en µs)."""
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agenteval.cli"],
+        check=True,
+        stderr=subprocess.PIPE,
+        text=True,
+    ).stderr
+    modulos = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        modulos.append((nombre.strip(), int(acumulado)))
+    # solo los módulos de primer nivel o los del propio paquete
+    modulos = [
+        (nombre, us) for nombre, us in modulos
+        if "." not in nombre or nombre.startswith("agenteval")
+    ]
+    return sorted(modulos, key=lambda m: m[1], reverse=True)[:cantidad]
+
+
+def principal():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de agenteval")
+    parser.add_argument("-n", "--repeticiones", type=int, default=10)
+    parser.add_argument("--detalle", type=int, default=0, metavar="N",
+                        help="Mostrar los N módulos más lentos de importar")
+    parser.add_argument("--json", action="store_true",
+                        help="Imprimir una línea JSON (para guardar el histórico)")
+    args = parser.parse_args()
+
+    # calentar la caché de bytecode para no medir la compilación
+    medir(COMANDOS["agenteval run --help"], 1)
+
+    resultados = {}
+    for nombre, comando in COMANDOS.items():
+        tiempos = medir(comando, args.repeticiones)
+        resultados[nombre] = {
+            "min_ms": round(min(tiempos) * 1000, 1),
+            "mediana_ms": round(statistics.median(tiempos) * 1000, 1),
+        }
+
+    if args.json:
+        print(json.dumps({
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "repeticiones": args.repeticiones,
+            "resultados": resultados,
+        }, ensure_ascii=False))
+        return
+
+    print(f"{'comando':<24}{'mín (ms)':>10}{'mediana (ms)':>14}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<24}{r['min_ms']:>10}{r['mediana_ms']:>14}")
+
+    if args.detalle:
+        print("\nMódulos más lentos de importar (acumulado):")
+        for nombre, us in modulos_mas_lentos(args.detalle):
+            print(f"  {us / 1000:8.1f} ms  {nombre}")
+
+
+if __name__ == "__main__":
+    principal()